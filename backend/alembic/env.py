@@ -12,8 +12,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import Base
 from models.user import User
 from models.job import Job
+from models.job_view_sketch import JobViewSketch, JobViewTotal
+from models.skill import Skill, JobSkill, CandidateSkill
 from models.application import Application
+from models.application_status_event import ApplicationStatusEvent, ApplicationTransitionDaily
+from models.employer_application_count import EmployerApplicationCount
+from models.job_application_count import JobApplicationCountShard
 from models.message import Message
+from models.conversation import Conversation
+from models.user_message_count import UserMessageCount
+from models.email_outbox import EmailOutbox
 from models.audit_log import AuditLog
 from models.system_settings import SystemSettings
 
@@ -0,0 +1,53 @@
+"""Add weighted full-text search vector to jobs
+
+Revision ID: 005_job_search_vector
+Revises: 004_add_resume_fields
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005_job_search_vector'
+down_revision = '004_add_resume_fields'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('jobs', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Trigger keeps the vector current on every insert/update of the searched columns
+    op.execute("""
+        CREATE OR REPLACE FUNCTION jobs_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(NEW.required_skills, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER jobs_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, required_skills, description ON jobs
+        FOR EACH ROW EXECUTE FUNCTION jobs_search_vector_update();
+    """)
+
+    # Backfill existing rows
+    op.execute("""
+        UPDATE jobs SET search_vector =
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(required_skills, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    """)
+
+    op.create_index('ix_jobs_search_vector', 'jobs', ['search_vector'], unique=False, postgresql_using='gin')
+
+def downgrade():
+    op.drop_index('ix_jobs_search_vector', table_name='jobs')
+    op.execute("DROP TRIGGER IF EXISTS jobs_search_vector_trigger ON jobs")
+    op.execute("DROP FUNCTION IF EXISTS jobs_search_vector_update()")
+    op.drop_column('jobs', 'search_vector')
@@ -0,0 +1,26 @@
+"""Add composite index for keyset pagination of job listings
+
+Revision ID: 006_jobs_keyset_index
+Revises: 005_job_search_vector
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006_jobs_keyset_index'
+down_revision = '005_job_search_vector'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        'ix_jobs_status_created_at_id',
+        'jobs',
+        ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+def downgrade():
+    op.drop_index('ix_jobs_status_created_at_id', table_name='jobs')
@@ -0,0 +1,27 @@
+"""Add per-day HyperLogLog unique viewer sketches for jobs
+
+Revision ID: 007_job_view_sketches
+Revises: 006_jobs_keyset_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_job_view_sketches'
+down_revision = '006_jobs_keyset_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('job_view_sketches',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id', 'day')
+    )
+
+def downgrade():
+    op.drop_table('job_view_sketches')
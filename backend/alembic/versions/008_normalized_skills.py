@@ -0,0 +1,121 @@
+"""Add normalized skills dictionary with job and candidate join tables
+
+Revision ID: 008_normalized_skills
+Revises: 007_job_view_sketches
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+import re
+
+# revision identifiers, used by Alembic.
+revision = '008_normalized_skills'
+down_revision = '007_job_view_sketches'
+branch_labels = None
+depends_on = None
+
+def _parse_skills(raw):
+    """Same normalization as utils.skills.parse_skills, frozen for this migration"""
+    if not raw:
+        return []
+    items = raw
+    if isinstance(raw, str):
+        items = None
+        if raw.strip().startswith('['):
+            try:
+                parsed = json.loads(raw)
+                if isinstance(parsed, list):
+                    items = parsed
+            except ValueError:
+                pass
+        if items is None:
+            items = raw.split(',')
+    skills = []
+    for item in items:
+        skill = re.sub(r'\s+', ' ', str(item)).strip().lower()[:100]
+        if skill and skill not in skills:
+            skills.append(skill)
+    return skills
+
+def upgrade():
+    op.create_table('skills',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_skills_id'), 'skills', ['id'], unique=False)
+    op.create_index(op.f('ix_skills_name'), 'skills', ['name'], unique=True)
+
+    op.create_table('job_skills',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id', 'skill_id')
+    )
+    op.create_index(op.f('ix_job_skills_skill_id'), 'job_skills', ['skill_id'], unique=False)
+
+    op.create_table('candidate_skills',
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['candidate_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('candidate_id', 'skill_id')
+    )
+    op.create_index(op.f('ix_candidate_skills_skill_id'), 'candidate_skills', ['skill_id'], unique=False)
+
+    # Backfill from the free-text / JSON columns
+    bind = op.get_bind()
+    job_links = [
+        (job_id, _parse_skills(required_skills))
+        for job_id, required_skills in bind.execute(
+            sa.text("SELECT id, required_skills FROM jobs WHERE required_skills IS NOT NULL")
+        )
+    ]
+    candidate_links = []
+    for user_id, skills, technical_skills in bind.execute(sa.text(
+        "SELECT id, skills, technical_skills FROM users "
+        "WHERE user_type = 'CANDIDATE' AND (skills IS NOT NULL OR technical_skills IS NOT NULL)"
+    )):
+        names = _parse_skills(skills)
+        names += [name for name in _parse_skills(technical_skills) if name not in names]
+        candidate_links.append((user_id, names))
+
+    names = sorted({name for _, skill_names in job_links + candidate_links for name in skill_names})
+    if not names:
+        return
+
+    skills_table = sa.table('skills', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    op.bulk_insert(skills_table, [{'name': name} for name in names])
+    skill_ids = dict(
+        (name, skill_id) for skill_id, name in bind.execute(sa.text("SELECT id, name FROM skills"))
+    )
+
+    job_skills_table = sa.table('job_skills', sa.column('job_id', sa.Integer), sa.column('skill_id', sa.Integer))
+    job_rows = [
+        {'job_id': job_id, 'skill_id': skill_ids[name]}
+        for job_id, skill_names in job_links for name in skill_names
+    ]
+    if job_rows:
+        op.bulk_insert(job_skills_table, job_rows)
+
+    candidate_skills_table = sa.table(
+        'candidate_skills', sa.column('candidate_id', sa.Integer), sa.column('skill_id', sa.Integer)
+    )
+    candidate_rows = [
+        {'candidate_id': user_id, 'skill_id': skill_ids[name]}
+        for user_id, skill_names in candidate_links for name in skill_names
+    ]
+    if candidate_rows:
+        op.bulk_insert(candidate_skills_table, candidate_rows)
+
+def downgrade():
+    op.drop_index(op.f('ix_candidate_skills_skill_id'), table_name='candidate_skills')
+    op.drop_table('candidate_skills')
+    op.drop_index(op.f('ix_job_skills_skill_id'), table_name='job_skills')
+    op.drop_table('job_skills')
+    op.drop_index(op.f('ix_skills_name'), table_name='skills')
+    op.drop_index(op.f('ix_skills_id'), table_name='skills')
+    op.drop_table('skills')
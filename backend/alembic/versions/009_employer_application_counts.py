@@ -0,0 +1,36 @@
+"""Add per-employer application status counters
+
+Revision ID: 009_employer_application_counts
+Revises: 008_normalized_skills
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_employer_application_counts'
+down_revision = '008_normalized_skills'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('employer_application_counts',
+        sa.Column('employer_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['employer_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('employer_id', 'status')
+    )
+
+    # Seed the counters with one grouped pass over existing applications
+    op.execute("""
+        INSERT INTO employer_application_counts (employer_id, status, count)
+        SELECT jobs.employer_id, CAST(applications.status AS VARCHAR), COUNT(*)
+        FROM applications
+        JOIN jobs ON jobs.id = applications.job_id
+        GROUP BY jobs.employer_id, applications.status
+    """)
+
+def downgrade():
+    op.drop_table('employer_application_counts')
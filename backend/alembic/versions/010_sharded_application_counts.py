@@ -0,0 +1,91 @@
+"""Shard application counters and make applications unique per job and candidate
+
+Revision ID: 010_sharded_application_counts
+Revises: 009_employer_application_counts
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_sharded_application_counts'
+down_revision = '009_employer_application_counts'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Fold duplicate applications (left by the old check-then-insert race) into the earliest one
+    op.execute("""
+        UPDATE messages SET application_id = keeper.id
+        FROM applications duplicate
+        JOIN applications keeper
+          ON keeper.job_id = duplicate.job_id
+         AND keeper.candidate_id = duplicate.candidate_id
+         AND keeper.id < duplicate.id
+        WHERE messages.application_id = duplicate.id
+    """)
+    op.execute("""
+        DELETE FROM applications duplicate
+        USING applications keeper
+        WHERE keeper.job_id = duplicate.job_id
+          AND keeper.candidate_id = duplicate.candidate_id
+          AND keeper.id < duplicate.id
+    """)
+    op.create_unique_constraint('uq_applications_job_candidate', 'applications', ['job_id', 'candidate_id'])
+
+    op.create_table('job_application_count_shards',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id', 'shard')
+    )
+
+    op.add_column('employer_application_counts',
+        sa.Column('shard', sa.SmallInteger(), nullable=False, server_default='0')
+    )
+    op.drop_constraint('employer_application_counts_pkey', 'employer_application_counts', type_='primary')
+    op.create_primary_key(
+        'employer_application_counts_pkey', 'employer_application_counts', ['employer_id', 'status', 'shard']
+    )
+
+    # Recount from scratch: lost increments and the removed duplicates both skewed the old values
+    op.execute("""
+        UPDATE jobs SET applications_count = COALESCE(
+            (SELECT COUNT(*) FROM applications WHERE applications.job_id = jobs.id), 0
+        )
+    """)
+    op.execute("DELETE FROM employer_application_counts")
+    op.execute("""
+        INSERT INTO employer_application_counts (employer_id, status, shard, count)
+        SELECT jobs.employer_id, CAST(applications.status AS VARCHAR), 0, COUNT(*)
+        FROM applications
+        JOIN jobs ON jobs.id = applications.job_id
+        GROUP BY jobs.employer_id, applications.status
+    """)
+
+def downgrade():
+    op.execute("""
+        UPDATE jobs SET applications_count = applications_count + shards.total
+        FROM (
+            SELECT job_id, SUM(count) AS total FROM job_application_count_shards GROUP BY job_id
+        ) shards
+        WHERE jobs.id = shards.job_id
+    """)
+    op.drop_table('job_application_count_shards')
+
+    op.execute("""
+        CREATE TEMPORARY TABLE merged_counts AS
+        SELECT employer_id, status, SUM(count) AS count
+        FROM employer_application_counts
+        GROUP BY employer_id, status
+    """)
+    op.execute("DELETE FROM employer_application_counts")
+    op.drop_constraint('employer_application_counts_pkey', 'employer_application_counts', type_='primary')
+    op.drop_column('employer_application_counts', 'shard')
+    op.create_primary_key('employer_application_counts_pkey', 'employer_application_counts', ['employer_id', 'status'])
+    op.execute("INSERT INTO employer_application_counts (employer_id, status, count) SELECT * FROM merged_counts")
+    op.execute("DROP TABLE merged_counts")
+
+    op.drop_constraint('uq_applications_job_candidate', 'applications', type_='unique')
@@ -0,0 +1,26 @@
+"""Add composite index for keyset pagination of a job's applications
+
+Revision ID: 011_applications_keyset_index
+Revises: 010_sharded_application_counts
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_applications_keyset_index'
+down_revision = '010_sharded_application_counts'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        'ix_applications_job_created_at_id',
+        'applications',
+        ['job_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+def downgrade():
+    op.drop_index('ix_applications_job_created_at_id', table_name='applications')
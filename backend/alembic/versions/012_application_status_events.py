@@ -0,0 +1,73 @@
+"""Add application status history and daily transition rollup
+
+Revision ID: 012_application_status_events
+Revises: 011_applications_keyset_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_application_status_events'
+down_revision = '011_applications_keyset_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # History starts now; earlier transitions were never recorded
+    op.create_table('application_status_events',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('application_id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('employer_id', sa.Integer(), nullable=False),
+        sa.Column('from_status', sa.String(length=50), nullable=True),
+        sa.Column('to_status', sa.String(length=50), nullable=False),
+        sa.Column('seconds_in_stage', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('rolled_up', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.ForeignKeyConstraint(['application_id'], ['applications.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['employer_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        op.f('ix_application_status_events_application_id'), 'application_status_events', ['application_id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_application_status_events_pending', 'application_status_events', ['id'],
+        unique=False, postgresql_where=sa.text('NOT rolled_up')
+    )
+
+    op.create_table('application_transition_daily',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('employer_id', sa.Integer(), nullable=False),
+        sa.Column('from_status', sa.String(length=50), nullable=True),
+        sa.Column('to_status', sa.String(length=50), nullable=False),
+        sa.Column('duration_bucket', sa.SmallInteger(), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['employer_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # NULLS NOT DISTINCT (PostgreSQL 15+) so new-application and unknown-duration rows upsert too
+    op.create_index(
+        'uq_application_transition_daily', 'application_transition_daily',
+        ['day', 'job_id', 'from_status', 'to_status', 'duration_bucket'],
+        unique=True, postgresql_nulls_not_distinct=True
+    )
+    op.create_index(
+        'ix_application_transition_daily_employer_day', 'application_transition_daily', ['employer_id', 'day'],
+        unique=False
+    )
+
+def downgrade():
+    op.drop_index('ix_application_transition_daily_employer_day', table_name='application_transition_daily')
+    op.drop_index('uq_application_transition_daily', table_name='application_transition_daily')
+    op.drop_table('application_transition_daily')
+    op.drop_index('ix_application_status_events_pending', table_name='application_status_events')
+    op.drop_index(op.f('ix_application_status_events_application_id'), table_name='application_status_events')
+    op.drop_table('application_status_events')
@@ -0,0 +1,29 @@
+"""Add cached applicant match scores
+
+Revision ID: 013_application_match_scores
+Revises: 012_application_status_events
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_application_match_scores'
+down_revision = '012_application_status_events'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Left empty: scores are computed on first request for each job's applicants
+    op.add_column('applications', sa.Column('match_score', sa.Float(), nullable=True))
+    op.create_index(
+        'ix_applications_job_match_score_id',
+        'applications',
+        ['job_id', sa.text('match_score DESC NULLS LAST'), sa.text('id DESC')],
+        unique=False
+    )
+
+def downgrade():
+    op.drop_index('ix_applications_job_match_score_id', table_name='applications')
+    op.drop_column('applications', 'match_score')
@@ -0,0 +1,37 @@
+"""Add transactional outbox for notification emails
+
+Revision ID: 014_email_outbox
+Revises: 013_application_match_scores
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014_email_outbox'
+down_revision = '013_application_match_scores'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('email_outbox',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('failed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_email_outbox_due', 'email_outbox', ['next_attempt_at'],
+        unique=False, postgresql_where=sa.text('sent_at IS NULL AND failed_at IS NULL')
+    )
+
+def downgrade():
+    op.drop_index('ix_email_outbox_due', table_name='email_outbox')
+    op.drop_table('email_outbox')
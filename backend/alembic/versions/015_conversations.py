@@ -0,0 +1,59 @@
+"""Add conversations summary table for the message inbox
+
+Revision ID: 015_conversations
+Revises: 014_email_outbox
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_conversations'
+down_revision = '014_email_outbox'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('conversations',
+        sa.Column('user_low_id', sa.Integer(), nullable=False),
+        sa.Column('user_high_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_id', sa.Integer(), nullable=True),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('unread_low', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('unread_high', sa.Integer(), nullable=False, server_default='0'),
+        sa.CheckConstraint('user_low_id <= user_high_id', name='ck_conversations_ordered_pair'),
+        sa.ForeignKeyConstraint(['user_low_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_high_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['last_message_id'], ['messages.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('user_low_id', 'user_high_id')
+    )
+    op.create_index(
+        'ix_conversations_low_last_message_at', 'conversations',
+        ['user_low_id', sa.text('last_message_at DESC')], unique=False
+    )
+    op.create_index(
+        'ix_conversations_high_last_message_at', 'conversations',
+        ['user_high_id', sa.text('last_message_at DESC')], unique=False
+    )
+
+    # Backfill one row per pair that has exchanged messages
+    op.execute("""
+        INSERT INTO conversations (user_low_id, user_high_id, last_message_id, last_message_at, unread_low, unread_high)
+        SELECT
+            LEAST(sender_id, recipient_id),
+            GREATEST(sender_id, recipient_id),
+            (ARRAY_AGG(id ORDER BY created_at DESC, id DESC))[1],
+            MAX(created_at),
+            COUNT(*) FILTER (WHERE is_read = false AND recipient_id = LEAST(sender_id, recipient_id)),
+            COUNT(*) FILTER (WHERE is_read = false AND recipient_id = GREATEST(sender_id, recipient_id)
+                             AND sender_id <> recipient_id)
+        FROM messages
+        WHERE created_at IS NOT NULL
+        GROUP BY LEAST(sender_id, recipient_id), GREATEST(sender_id, recipient_id)
+    """)
+
+def downgrade():
+    op.drop_index('ix_conversations_high_last_message_at', table_name='conversations')
+    op.drop_index('ix_conversations_low_last_message_at', table_name='conversations')
+    op.drop_table('conversations')
@@ -0,0 +1,31 @@
+"""Add expression index for keyset paging of conversation history
+
+Revision ID: 016_messages_pair_keyset_index
+Revises: 015_conversations
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016_messages_pair_keyset_index'
+down_revision = '015_conversations'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        'ix_messages_pair_created_at_id',
+        'messages',
+        [
+            sa.text('LEAST(sender_id, recipient_id)'),
+            sa.text('GREATEST(sender_id, recipient_id)'),
+            'created_at',
+            'id'
+        ],
+        unique=False
+    )
+
+def downgrade():
+    op.drop_index('ix_messages_pair_created_at_id', table_name='messages')
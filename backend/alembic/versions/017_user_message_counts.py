@@ -0,0 +1,40 @@
+"""Add per-user unread message counters and an unread partial index
+
+Revision ID: 017_user_message_counts
+Revises: 016_messages_pair_keyset_index
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017_user_message_counts'
+down_revision = '016_messages_pair_keyset_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('user_message_counts',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unread_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(
+        'ix_messages_recipient_unread', 'messages', ['recipient_id'],
+        unique=False, postgresql_where=sa.text('is_read = false')
+    )
+
+    # Seed counters from the current unread messages
+    op.execute("""
+        INSERT INTO user_message_counts (user_id, unread_count)
+        SELECT recipient_id, COUNT(*)
+        FROM messages
+        WHERE is_read = false
+        GROUP BY recipient_id
+    """)
+
+def downgrade():
+    op.drop_index('ix_messages_recipient_unread', table_name='messages')
+    op.drop_table('user_message_counts')
@@ -0,0 +1,34 @@
+"""Add full-text search vector and GIN index to messages
+
+Revision ID: 018_message_search
+Revises: 017_user_message_counts
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '018_message_search'
+down_revision = '017_user_message_counts'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Stored generated column: Postgres fills it for existing rows and keeps it current
+    op.add_column('messages', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(subject, '')), 'A') || "
+            "setweight(to_tsvector('english', content), 'B')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.create_index('ix_messages_search_vector', 'messages', ['search_vector'], unique=False, postgresql_using='gin')
+
+def downgrade():
+    op.drop_index('ix_messages_search_vector', table_name='messages')
+    op.drop_column('messages', 'search_vector')
@@ -0,0 +1,42 @@
+"""Add all-time unique viewer sketches and estimates per job
+
+Revision ID: 019_job_view_totals
+Revises: 018_message_search
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from utils.hyperloglog import HyperLogLog
+
+# revision identifiers, used by Alembic.
+revision = '019_job_view_totals'
+down_revision = '018_message_search'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    job_view_totals = op.create_table('job_view_totals',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.Column('unique_views', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id')
+    )
+
+    # Union each job's daily sketches once, job by job, so memory stays bounded
+    connection = op.get_bind()
+    job_ids = connection.execute(sa.text("SELECT DISTINCT job_id FROM job_view_sketches ORDER BY job_id")).scalars().all()
+    for job_id in job_ids:
+        total = None
+        for data in connection.execute(
+            sa.text("SELECT sketch FROM job_view_sketches WHERE job_id = :job_id"), {"job_id": job_id}
+        ).scalars():
+            sketch = HyperLogLog.from_bytes(data)
+            total = sketch if total is None else total.merge(sketch)
+        op.bulk_insert(job_view_totals, [
+            {"job_id": job_id, "sketch": total.to_bytes(), "unique_views": total.count()}
+        ])
+
+def downgrade():
+    op.drop_table('job_view_totals')
@@ -0,0 +1,34 @@
+"""Index applicant match ordering on a NULL-free sort key
+
+Revision ID: 020_applications_match_sort_key
+Revises: 019_job_view_totals
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020_applications_match_sort_key'
+down_revision = '019_job_view_totals'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Unscored applicants sort as -1 so keyset cursors can page past them
+    op.drop_index('ix_applications_job_match_score_id', table_name='applications')
+    op.create_index(
+        'ix_applications_job_match_score_id',
+        'applications',
+        ['job_id', sa.text('COALESCE(match_score, -1) DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+def downgrade():
+    op.drop_index('ix_applications_job_match_score_id', table_name='applications')
+    op.create_index(
+        'ix_applications_job_match_score_id',
+        'applications',
+        ['job_id', sa.text('match_score DESC NULLS LAST'), sa.text('id DESC')],
+        unique=False
+    )
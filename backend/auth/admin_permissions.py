@@ -1,5 +1,5 @@
 from fastapi import HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.user import User, UserType
 from models.audit_log import AuditLog
@@ -54,8 +54,8 @@ def has_permission(admin: User, permission: str) -> bool:
     role_perms = ROLE_PERMISSIONS.get(admin.admin_role, [])
     return permission in role_perms
 
-def log_admin_action(
-    db: Session,
+async def log_admin_action(
+    db: AsyncSession,
     admin_id: int,
     action: str,
     target_type: str,
@@ -75,24 +75,24 @@ def log_admin_action(
         user_agent=user_agent
     )
     db.add(audit_log)
-    db.commit()
+    await db.commit()
 
 def get_admin_with_user_write_permission(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(require_permission("user.write"))
 ) -> User:
     """Dependency to get admin with user write permission"""
     return current_admin
 
 def get_admin_with_analytics_permission(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(require_permission("analytics.read"))
 ) -> User:
     """Dependency to get admin with analytics read permission"""
     return current_admin
 
 def get_super_admin(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ) -> User:
     """Dependency to get super admin only"""
@@ -1,15 +1,18 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.user import User
 from auth.security import verify_token
+from typing import Optional
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current authenticated user"""
     token = credentials.credentials
@@ -30,7 +33,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == int(user_id)))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,4 +51,17 @@ def get_current_user(
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current active user"""
-    return current_user
\ No newline at end of file
+    return current_user
+
+def get_optional_user_id(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[int]:
+    """Get the caller's user id from a valid access token, if one was sent"""
+    if credentials is None:
+        return None
+    
+    payload = verify_token(credentials.credentials, "access")
+    if payload is None or payload.get("sub") is None:
+        return None
+    
+    return int(payload["sub"])
\ No newline at end of file
@@ -104,6 +104,13 @@ class Settings:
         cast=lambda v: [s.strip() for s in v.split(',')]
     )
     
+    # Proxies whose X-Forwarded-For is trusted for the client address; empty means none
+    TRUSTED_PROXIES: List[str] = config(
+        'TRUSTED_PROXIES',
+        default='',
+        cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+    )
+    
     # Logging
     LOG_LEVEL: str = config('LOG_LEVEL', default='INFO')
     LOG_FORMAT: str = config('LOG_FORMAT', default='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
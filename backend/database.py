@@ -1,41 +1,63 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from decouple import config
 import os
 
-# Database configuration  
+# Database configuration
 def get_database_url():
     """Get database URL from environment variables or config"""
     # Try to get from environment first
     database_url = os.getenv('DATABASE_URL')
     if database_url:
         return database_url
-    
+
     # Fallback to individual components
     db_host = os.getenv('DB_HOST', 'localhost')
     db_port = os.getenv('DB_PORT', '5432')
     db_name = os.getenv('DB_NAME', 'jobplatform')
     db_user = os.getenv('DB_USER', 'dbadmin')
     db_password = os.getenv('DB_PASSWORD', 'password')
-    
+
     return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
 
+def get_async_database_url(database_url: str) -> str:
+    """Rewrite a postgres URL so SQLAlchemy uses the asyncpg driver"""
+    for prefix in ("postgresql+psycopg2://", "postgresql+psycopg://", "postgresql://", "postgres://"):
+        if database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + database_url[len(prefix):]
+    return database_url
+
 DATABASE_URL = get_database_url()
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
 
-# Create SQLAlchemy engine
+# Create SQLAlchemy engine (used for table creation, migrations and scripts)
 engine = create_engine(DATABASE_URL)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API request path so queries never block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=config('DB_POOL_SIZE', default=10, cast=int),
+    max_overflow=config('DB_MAX_OVERFLOW', default=20, cast=int),
+    pool_pre_ping=True,
+)
+
+# Objects stay usable after commit; lazy loads are not available on AsyncSession
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Create Base class
 Base = declarative_base()
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
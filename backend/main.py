@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
+from database import engine, async_engine, Base
 from routers import auth, admin, jobs, settings, applications, messages, uploads
-from models import user, audit_log, system_settings, job, application, message
+from models import user, audit_log, system_settings, job, application, application_status_event, employer_application_count, job_application_count, message, conversation, user_message_count, email_outbox, job_view_sketch, skill
 from config import settings as config
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.view_counter import view_counter
+from utils.application_counts import application_count_compactor
+from utils.application_funnel import application_funnel_rollup
+from utils.message_hub import message_hub
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -21,8 +26,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.on_event("startup")
+async def start_view_counter():
+    """Start the periodic job view count flush"""
+    view_counter.start()
+
+@app.on_event("shutdown")
+async def flush_view_counter():
+    """Write out buffered job views before the process exits"""
+    await view_counter.stop()
+
+@app.on_event("startup")
+async def start_application_count_compactor():
+    """Start folding sharded application counts into jobs"""
+    application_count_compactor.start()
+
+@app.on_event("shutdown")
+async def compact_application_counts():
+    """Fold remaining application count shards into jobs before the process exits"""
+    await application_count_compactor.stop()
+
+@app.on_event("startup")
+async def start_application_funnel_rollup():
+    """Start rolling status events up into daily funnel counts"""
+    application_funnel_rollup.start()
+
+@app.on_event("shutdown")
+async def roll_up_application_funnel():
+    """Roll up remaining status events before the process exits"""
+    await application_funnel_rollup.stop()
+
+@app.on_event("startup")
+async def start_message_hub():
+    """Start relaying message events published by other workers"""
+    message_hub.start()
+
+@app.on_event("shutdown")
+async def stop_message_hub():
+    """Stop the message event listener and close open subscriptions"""
+    await message_hub.stop()
+
+@app.on_event("shutdown")
+async def dispose_database_connections():
+    """Close pooled asyncpg connections on shutdown"""
+    await async_engine.dispose()
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(admin.router)
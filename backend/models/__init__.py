@@ -4,4 +4,12 @@ from .audit_log import AuditLog
 from .system_settings import SystemSettings
 from .job import Job, JobStatus, EmploymentType, LocationType
 from .application import Application, ApplicationStatus
-from .message import Message
\ No newline at end of file
+from .application_status_event import ApplicationStatusEvent, ApplicationTransitionDaily
+from .employer_application_count import EmployerApplicationCount
+from .job_application_count import JobApplicationCountShard
+from .message import Message
+from .conversation import Conversation
+from .user_message_count import UserMessageCount
+from .email_outbox import EmailOutbox
+from .job_view_sketch import JobViewSketch, JobViewTotal
+from .skill import Skill, JobSkill, CandidateSkill
\ No newline at end of file
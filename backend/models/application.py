@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey, Enum, Index, UniqueConstraint
+from sqlalchemy.sql import func, literal_column
 from sqlalchemy.orm import relationship
 from database import Base
 import enum
@@ -17,6 +17,10 @@ class ApplicationStatus(enum.Enum):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # One application per candidate per job; apply_to_job relies on it for ON CONFLICT
+        UniqueConstraint("job_id", "candidate_id", name="uq_applications_job_candidate"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -33,6 +37,9 @@ class Application(Base):
     status = Column(Enum(ApplicationStatus), nullable=False, default=ApplicationStatus.PENDING)
     employer_notes = Column(Text, nullable=True)
     
+    # Cached fit of the candidate to the job (utils.applicant_matching); None until scored
+    match_score = Column(Float, nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -41,4 +48,17 @@ class Application(Base):
     # Relationships
     job = relationship("Job", back_populates="applications")
     candidate = relationship("User", foreign_keys=[candidate_id], back_populates="applications")
-    messages = relationship("Message", back_populates="application", cascade="all, delete-orphan")
\ No newline at end of file
+    messages = relationship("Message", back_populates="application", cascade="all, delete-orphan")
+
+# Backs keyset pagination of a job's applicants (newest first)
+Index("ix_applications_job_created_at_id", Application.job_id, Application.created_at.desc(), Application.id.desc())
+
+# Sort key for match ordering; scores are in [0, 1], so unscored applicants (NULL) sort last
+# and keyset cursors can still compare them. A literal keeps it identical to the index expression.
+APPLICATION_MATCH_SORT_KEY = func.coalesce(Application.match_score, literal_column("-1"))
+
+# Backs applicant listings sorted by match score
+Index(
+    "ix_applications_job_match_score_id",
+    Application.job_id, APPLICATION_MATCH_SORT_KEY.desc(), Application.id.desc()
+)
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, Date, DateTime, Boolean, ForeignKey, Enum, Index
+from sqlalchemy.sql import func
+from database import Base
+from .application import ApplicationStatus
+
+class ApplicationStatusEvent(Base):
+    __tablename__ = "application_status_events"
+
+    # Append-only history of status changes, written in the same transaction as the change
+    id = Column(BigInteger, primary_key=True)
+    application_id = Column(Integer, ForeignKey("applications.id", ondelete="CASCADE"), nullable=False, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
+    employer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Statuses are stored as VARCHAR(50) of the member name, matching migration 012
+    from_status = Column(Enum(ApplicationStatus, native_enum=False, length=50), nullable=True)  # None for the application itself
+    to_status = Column(Enum(ApplicationStatus, native_enum=False, length=50), nullable=False)
+    seconds_in_stage = Column(Integer, nullable=True)  # Time spent in from_status, when known
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Cleared once the event is counted in application_transition_daily
+    rolled_up = Column(Boolean, nullable=False, default=False, server_default="false")
+
+# Lets the rollup find new events without scanning the whole history
+Index(
+    "ix_application_status_events_pending",
+    ApplicationStatusEvent.id,
+    postgresql_where=ApplicationStatusEvent.rolled_up == False
+)
+
+class ApplicationTransitionDaily(Base):
+    __tablename__ = "application_transition_daily"
+
+    # Transitions per day, job and stage pair, bucketed by time spent in the stage left
+    # (see utils.application_funnel.duration_bucket; None when the time is unknown)
+    id = Column(BigInteger, primary_key=True)
+    day = Column(Date, nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
+    employer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    from_status = Column(Enum(ApplicationStatus, native_enum=False, length=50), nullable=True)
+    to_status = Column(Enum(ApplicationStatus, native_enum=False, length=50), nullable=False)
+    duration_bucket = Column(SmallInteger, nullable=True)
+    count = Column(Integer, nullable=False, default=0)
+
+Index(
+    "uq_application_transition_daily",
+    ApplicationTransitionDaily.day,
+    ApplicationTransitionDaily.job_id,
+    ApplicationTransitionDaily.from_status,
+    ApplicationTransitionDaily.to_status,
+    ApplicationTransitionDaily.duration_bucket,
+    unique=True,
+    postgresql_nulls_not_distinct=True
+)
+Index("ix_application_transition_daily_employer_day", ApplicationTransitionDaily.employer_id, ApplicationTransitionDaily.day)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, CheckConstraint, Index
+from database import Base
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+    __table_args__ = (
+        # The pair is unordered, so it is always stored smaller id first
+        CheckConstraint("user_low_id <= user_high_id", name="ck_conversations_ordered_pair"),
+    )
+
+    # Inbox summary of the messages between two users, maintained by utils.conversations
+    user_low_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    user_high_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    last_message_id = Column(Integer, ForeignKey("messages.id", ondelete="SET NULL"), nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Messages each side has not read yet
+    unread_low = Column(Integer, nullable=False, default=0, server_default="0")
+    unread_high = Column(Integer, nullable=False, default=0, server_default="0")
+
+# Back the inbox query from either side of the pair, newest first
+Index("ix_conversations_low_last_message_at", Conversation.user_low_id, Conversation.last_message_at.desc())
+Index("ix_conversations_high_last_message_at", Conversation.user_high_id, Conversation.last_message_at.desc())
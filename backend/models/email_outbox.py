@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, JSON, Index
+from sqlalchemy.sql import func
+from database import Base
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    # Notification emails queued in the request transaction and sent by utils.email_outbox
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String(50), nullable=False)  # Key of utils.email_outbox.EMAIL_SENDERS
+    payload = Column(JSON, nullable=False)  # Keyword arguments for the sender
+
+    # Delivery tracking
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)  # Gave up after the last retry
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Only undelivered mail is indexed, so the queue scan stays small however much history accumulates
+Index(
+    "ix_email_outbox_due",
+    EmailOutbox.next_attempt_at,
+    postgresql_where=(EmailOutbox.sent_at.is_(None) & EmailOutbox.failed_at.is_(None))
+)
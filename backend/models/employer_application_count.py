@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, SmallInteger, ForeignKey, Enum
+from database import Base
+from .application import ApplicationStatus
+
+class EmployerApplicationCount(Base):
+    __tablename__ = "employer_application_counts"
+    
+    # Running number of applications per status across all of an employer's jobs,
+    # split over a few shard rows that are summed on read
+    employer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Stored as VARCHAR(50) of the member name, matching migration 009
+    status = Column(Enum(ApplicationStatus, native_enum=False, length=50), primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
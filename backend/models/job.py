@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Float, Index, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 import enum
 
@@ -65,7 +66,36 @@ class Job(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     published_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Full-text search document (title > skills > description), maintained by trigger
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    
     # Relationships
     employer = relationship("User", back_populates="jobs")
     applications = relationship("Application", back_populates="job", cascade="all, delete-orphan")
-    messages = relationship("Message", back_populates="job", cascade="all, delete-orphan")
\ No newline at end of file
+    messages = relationship("Message", back_populates="job", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_jobs_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+# Backs keyset pagination of public listings (status filter, newest first)
+Index("ix_jobs_status_created_at_id", Job.status, Job.created_at.desc(), Job.id.desc())
+
+# Keeps search_vector in sync on every write; mirrored in migration 005
+JOBS_SEARCH_VECTOR_TRIGGER = DDL("""
+CREATE OR REPLACE FUNCTION jobs_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.required_skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER jobs_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, required_skills, description ON jobs
+FOR EACH ROW EXECUTE FUNCTION jobs_search_vector_update();
+""")
+
+event.listen(Job.__table__, "after_create", JOBS_SEARCH_VECTOR_TRIGGER.execute_if(dialect="postgresql"))
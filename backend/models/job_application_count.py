@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, SmallInteger, ForeignKey
+from database import Base
+
+class JobApplicationCountShard(Base):
+    __tablename__ = "job_application_count_shards"
+    
+    # Not-yet-compacted application increments, spread over a few rows per job so
+    # concurrent applicants to one posting don't queue on a single row lock
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(SmallInteger, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
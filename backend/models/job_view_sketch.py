@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Date, LargeBinary, ForeignKey
+from database import Base
+
+class JobViewSketch(Base):
+    __tablename__ = "job_view_sketches"
+    
+    # One HyperLogLog sketch of distinct viewers per job per UTC day
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    sketch = Column(LargeBinary, nullable=False)
+
+class JobViewTotal(Base):
+    __tablename__ = "job_view_totals"
+    
+    # All-time union of a job's daily sketches and its estimate, kept current at flush time
+    # so detail views read one small row instead of merging every day
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    sketch = Column(LargeBinary, nullable=False)
+    unique_views = Column(Integer, nullable=False, default=0)
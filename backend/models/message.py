@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from database import Base
 
+MESSAGE_SEARCH_CONFIG = "english"
+MESSAGE_SEARCH_DOCUMENT = (
+    f"setweight(to_tsvector('{MESSAGE_SEARCH_CONFIG}', coalesce(subject, '')), 'A') || "
+    f"setweight(to_tsvector('{MESSAGE_SEARCH_CONFIG}', content), 'B')"
+)
+
 class Message(Base):
     __tablename__ = "messages"
     
@@ -28,8 +35,34 @@ class Message(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     read_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Full-text document kept up to date by Postgres, subject weighted above content;
+    # deferred so ordinary message loads do not fetch it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(MESSAGE_SEARCH_DOCUMENT, persisted=True)
+    ))
+    
     # Relationships
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_messages")
     recipient = relationship("User", foreign_keys=[recipient_id], back_populates="received_messages")
     job = relationship("Job", back_populates="messages")
-    application = relationship("Application", back_populates="messages")
\ No newline at end of file
+    application = relationship("Application", back_populates="messages")
+
+# Keyset paging of one conversation's history; the pair is unordered, so it is indexed smaller id first
+Index(
+    "ix_messages_pair_created_at_id",
+    func.least(Message.sender_id, Message.recipient_id),
+    func.greatest(Message.sender_id, Message.recipient_id),
+    Message.created_at,
+    Message.id
+)
+
+# Only unread messages are indexed, for recounting a user's unread total
+Index(
+    "ix_messages_recipient_unread",
+    Message.recipient_id,
+    postgresql_where=(Message.is_read == False)
+)
+
+# Backs GET /api/messages/search
+Index("ix_messages_search_vector", Message.search_vector, postgresql_using="gin")
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from database import Base
+
+class Skill(Base):
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, index=True, nullable=False)  # normalized: lowercase, single-spaced
+
+class JobSkill(Base):
+    __tablename__ = "job_skills"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class CandidateSkill(Base):
+    __tablename__ = "candidate_skills"
+    
+    candidate_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True, index=True)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from database import Base
+
+class UserMessageCount(Base):
+    __tablename__ = "user_message_counts"
+
+    # Running number of unread messages per recipient, maintained by utils.conversations
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0, server_default="0")
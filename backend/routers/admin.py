@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.user import User, UserType
 from models.audit_log import AuditLog
@@ -10,6 +10,7 @@ from schemas.admin import (
     AuditLogResponse, SystemSettingsResponse, SystemSettingsCreate, SystemSettingsUpdate
 )
 from schemas.user import UserResponse
+from utils.application_counts import load_application_counts
 from auth.admin_permissions import (
     get_current_admin, get_admin_with_user_write_permission, 
     get_admin_with_analytics_permission, get_super_admin, log_admin_action
@@ -23,7 +24,7 @@ router = APIRouter(prefix="/api/admin", tags=["admin"])
 # User Management Endpoints
 @router.get("/users", response_model=List[UserListItem])
 async def get_all_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -32,15 +33,15 @@ async def get_all_users(
     search: Optional[str] = Query(None)
 ):
     """Get all users with filtering and pagination"""
-    query = db.query(User)
+    query = select(User)
     
     # Apply filters
     if user_type:
-        query = query.filter(User.user_type == user_type)
+        query = query.where(User.user_type == user_type)
     if is_active is not None:
-        query = query.filter(User.is_active == is_active)
+        query = query.where(User.is_active == is_active)
     if search:
-        query = query.filter(
+        query = query.where(
             (User.name.ilike(f"%{search}%")) | 
             (User.email.ilike(f"%{search}%"))
         )
@@ -49,10 +50,11 @@ async def get_all_users(
     query = query.order_by(desc(User.created_at))
     
     # Apply pagination
-    users = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    users = result.scalars().all()
     
     # Log admin action
-    log_admin_action(
+    await log_admin_action(
         db=db,
         admin_id=current_admin.id,
         action="users_list_accessed",
@@ -65,11 +67,11 @@ async def get_all_users(
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user_details(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Get detailed information about a specific user"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,7 +79,7 @@ async def get_user_details(
         )
     
     # Log admin action
-    log_admin_action(
+    await log_admin_action(
         db=db,
         admin_id=current_admin.id,
         action="user_details_accessed",
@@ -91,11 +93,11 @@ async def get_user_details(
 async def update_user(
     user_id: int,
     user_update: UserUpdateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_admin_with_user_write_permission)
 ):
     """Update user information"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -116,11 +118,11 @@ async def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     # Log admin action
-    log_admin_action(
+    await log_admin_action(
         db=db,
         admin_id=current_admin.id,
         action="user_updated",
@@ -134,11 +136,11 @@ async def update_user(
 @router.post("/users/{user_id}/toggle-active")
 async def toggle_user_active_status(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_admin_with_user_write_permission)
 ):
     """Toggle user active status"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -154,11 +156,11 @@ async def toggle_user_active_status(
     
     original_status = user.is_active
     user.is_active = not user.is_active
-    db.commit()
+    await db.commit()
     
     # Log admin action
     action = "user_activated" if user.is_active else "user_deactivated"
-    log_admin_action(
+    await log_admin_action(
         db=db,
         admin_id=current_admin.id,
         action=action,
@@ -172,7 +174,7 @@ async def toggle_user_active_status(
 # Analytics Endpoints
 @router.get("/analytics", response_model=PlatformAnalytics)
 async def get_platform_analytics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_admin_with_analytics_permission)
 ):
     """Get platform analytics and statistics"""
@@ -182,16 +184,16 @@ async def get_platform_analytics(
     month_start = today_start - timedelta(days=30)
     
     # Get user statistics
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    employers = db.query(User).filter(User.user_type == UserType.EMPLOYER).count()
-    candidates = db.query(User).filter(User.user_type == UserType.CANDIDATE).count()
-    admins = db.query(User).filter(User.user_type == UserType.ADMIN).count()
-    verified_users = db.query(User).filter(User.is_verified == True).count()
+    total_users = await db.scalar(select(func.count(User.id)))
+    active_users = await db.scalar(select(func.count(User.id)).where(User.is_active == True))
+    employers = await db.scalar(select(func.count(User.id)).where(User.user_type == UserType.EMPLOYER))
+    candidates = await db.scalar(select(func.count(User.id)).where(User.user_type == UserType.CANDIDATE))
+    admins = await db.scalar(select(func.count(User.id)).where(User.user_type == UserType.ADMIN))
+    verified_users = await db.scalar(select(func.count(User.id)).where(User.is_verified == True))
     
-    new_users_today = db.query(User).filter(User.created_at >= today_start).count()
-    new_users_this_week = db.query(User).filter(User.created_at >= week_start).count()
-    new_users_this_month = db.query(User).filter(User.created_at >= month_start).count()
+    new_users_today = await db.scalar(select(func.count(User.id)).where(User.created_at >= today_start))
+    new_users_this_week = await db.scalar(select(func.count(User.id)).where(User.created_at >= week_start))
+    new_users_this_month = await db.scalar(select(func.count(User.id)).where(User.created_at >= month_start))
     
     user_stats = UserStatistics(
         total_users=total_users,
@@ -206,7 +208,7 @@ async def get_platform_analytics(
     )
     
     # Log admin action
-    log_admin_action(
+    await log_admin_action(
         db=db,
         admin_id=current_admin.id,
         action="analytics_accessed",
@@ -218,7 +220,7 @@ async def get_platform_analytics(
 # Audit Log Endpoints
 @router.get("/audit-logs", response_model=List[AuditLogResponse])
 async def get_audit_logs(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_super_admin),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
@@ -226,25 +228,26 @@ async def get_audit_logs(
     target_type: Optional[str] = Query(None)
 ):
     """Get audit logs (super admin only)"""
-    query = db.query(AuditLog)
+    query = select(AuditLog)
     
     # Apply filters
     if action:
-        query = query.filter(AuditLog.action == action)
+        query = query.where(AuditLog.action == action)
     if target_type:
-        query = query.filter(AuditLog.target_type == target_type)
+        query = query.where(AuditLog.target_type == target_type)
     
     # Order by creation date (newest first)
     query = query.order_by(desc(AuditLog.created_at))
     
     # Apply pagination
-    logs = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    logs = result.scalars().all()
     
     return logs
 
 @router.get("/analytics/trends")
 async def get_analytics_trends(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_admin_with_analytics_permission),
     days: int = Query(30, ge=7, le=90)
 ):
@@ -256,12 +259,14 @@ async def get_analytics_trends(
     daily_registrations = []
     for i in range(days):
         date = start_date + timedelta(days=i)
-        next_date = date + timedelta(days=1)
+        # asyncpg only binds datetimes to timestamp columns
+        day_start = datetime.combine(date, datetime.min.time())
+        next_date = day_start + timedelta(days=1)
         
-        count = db.query(User).filter(
-            User.created_at >= date,
+        count = await db.scalar(select(func.count(User.id)).where(
+            User.created_at >= day_start,
             User.created_at < next_date
-        ).count()
+        ))
         
         daily_registrations.append({
             "date": date.isoformat(),
@@ -277,14 +282,14 @@ async def get_analytics_trends(
     
     for i in range(days):
         date = start_date + timedelta(days=i)
-        next_date = date + timedelta(days=1)
+        next_date = datetime.combine(date, datetime.min.time()) + timedelta(days=1)
         
         for user_type in ["candidate", "employer", "admin"]:
-            count = db.query(User).filter(
+            count = await db.scalar(select(func.count(User.id)).where(
                 User.user_type == user_type,
-                User.created_at >= start_date,
+                User.created_at >= datetime.combine(start_date, datetime.min.time()),
                 User.created_at < next_date
-            ).count()
+            ))
             
             user_type_trends[f"{user_type}s"].append({
                 "date": date.isoformat(),
@@ -305,26 +310,28 @@ async def get_analytics_trends(
 @router.get("/users/{user_id}/jobs")
 async def get_user_jobs(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Get jobs posted by an employer user"""
     from models.job import Job
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    if user.user_type != 'employer':
+    if user.user_type != UserType.EMPLOYER:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is not an employer"
         )
     
-    jobs = db.query(Job).filter(Job.employer_id == user_id).all()
+    result = await db.execute(select(Job).where(Job.employer_id == user_id))
+    jobs = result.scalars().all()
+    await load_application_counts(db, jobs)
     
     return [{
         "id": job.id,
@@ -337,14 +344,15 @@ async def get_user_jobs(
 @router.get("/users/{user_id}/applications")
 async def get_user_applications(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Get applications submitted by a candidate user"""
     from models.application import Application
     from models.job import Job
+    from sqlalchemy.orm import joinedload
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -357,9 +365,13 @@ async def get_user_applications(
             detail="User is not a candidate"
         )
     
-    applications = db.query(Application).join(Job).filter(
-        Application.candidate_id == user_id
-    ).all()
+    result = await db.execute(
+        select(Application)
+        .options(joinedload(Application.job))
+        .join(Job)
+        .where(Application.candidate_id == user_id)
+    )
+    applications = result.scalars().all()
     
     return [{
         "id": app.id,
@@ -1,20 +1,89 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, and_
-from database import get_db
-from models.application import Application, ApplicationStatus
+from fastapi.responses import StreamingResponse
+from sqlalchemy import desc, and_, case, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload
+from database import get_db, AsyncSessionLocal
+from models.application import Application, ApplicationStatus, APPLICATION_MATCH_SORT_KEY
+from models.application_status_event import ApplicationTransitionDaily
 from models.job import Job
 from models.user import User, UserType
-from schemas.job import ApplicationResponse, ApplicationUpdate
+from schemas.job import (
+    ApplicationResponse, ApplicationUpdate, ApplicationStatusEnum, ExportFormatEnum,
+    ApplicationPipelineResponse, ApplicationFunnelResponse, ApplicantSortEnum
+)
 from auth.dependencies import get_current_user
+from utils.pagination import encode_cursor, decode_cursor
+from utils.application_counts import adjust_status_counts, get_status_counts
+from utils.application_funnel import StatusChange, record_status_changes, median_seconds
+from utils.applicant_matching import ensure_match_scores
+from utils.email_outbox import enqueue_email, enqueue_emails
 from typing import List, Optional
+from collections import Counter
+from datetime import datetime, timedelta
+import csv
+import enum
+import io
+import json
 
 router = APIRouter(prefix="/api/applications", tags=["applications"])
 
+# Rows fetched per server-side cursor round trip, and bytes buffered per streamed chunk
+EXPORT_FETCH_SIZE = 2000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_COLUMNS = {
+    "application_id": Application.id,
+    "job_id": Application.job_id,
+    "job_title": Job.title,
+    "candidate_id": Application.candidate_id,
+    "candidate_name": User.name,
+    "candidate_email": User.email,
+    "status": Application.status,
+    "cover_letter": Application.cover_letter,
+    "additional_notes": Application.additional_notes,
+    "employer_notes": Application.employer_notes,
+    "resume_url": Application.resume_url,
+    "created_at": Application.created_at,
+    "updated_at": Application.updated_at,
+    "reviewed_at": Application.reviewed_at,
+}
+
+def _export_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def _stream_export(query, export_format: ExportFormatEnum):
+    """Yield an export in ~64KB chunks, reading rows through a server-side cursor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == ExportFormatEnum.CSV else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+    
+    # A session of its own: the request's session may be closed before the body is sent
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_FETCH_SIZE))
+        async for row in result:
+            values = [_export_value(value) for value in row]
+            if writer:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))) + "\n")
+            
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    
+    yield buffer.getvalue()
+
 # Candidate endpoints
 @router.get("/my-applications", response_model=List[ApplicationResponse])
 async def get_my_applications(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     status_filter: Optional[str] = Query(None)
 ):
@@ -25,15 +94,16 @@ async def get_my_applications(
             detail="Only candidates can access this endpoint"
         )
     
-    query = db.query(Application).options(
+    query = select(Application).options(
         joinedload(Application.job),
         joinedload(Application.candidate)
-    ).filter(Application.candidate_id == current_user.id)
+    ).where(Application.candidate_id == current_user.id)
     
     if status_filter:
-        query = query.filter(Application.status == status_filter)
+        query = query.where(Application.status == status_filter)
     
-    applications = query.order_by(desc(Application.created_at)).all()
+    result = await db.execute(query.order_by(desc(Application.created_at)))
+    applications = result.scalars().all()
     
     # Add job and candidate info
     for app in applications:
@@ -47,14 +117,14 @@ async def get_my_applications(
 @router.get("/{application_id}", response_model=ApplicationResponse)
 async def get_application_detail(
     application_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get application details"""
-    application = db.query(Application).options(
+    application = await db.scalar(select(Application).options(
         joinedload(Application.job),
         joinedload(Application.candidate)
-    ).filter(Application.id == application_id).first()
+    ).where(Application.id == application_id))
     
     if not application:
         raise HTTPException(
@@ -92,7 +162,7 @@ async def get_application_detail(
 async def update_application_status(
     application_id: int,
     status_update: ApplicationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update application status (employer only)"""
@@ -102,10 +172,10 @@ async def update_application_status(
             detail="Only employers can update application status"
         )
     
-    application = db.query(Application).options(
+    application = await db.scalar(select(Application).options(
         joinedload(Application.job),
         joinedload(Application.candidate)
-    ).filter(Application.id == application_id).first()
+    ).where(Application.id == application_id))
     
     if not application:
         raise HTTPException(
@@ -122,35 +192,55 @@ async def update_application_status(
     
     # Update fields
     update_data = status_update.dict(exclude_unset=True)
+    if update_data.get('status') is not None:
+        update_data['status'] = ApplicationStatus(update_data['status'])
+    else:
+        update_data.pop('status', None)
+    
+    previous_status = application.status
     for field, value in update_data.items():
         if field == 'status':
             # Set reviewed timestamp when status changes from pending
             if application.status == ApplicationStatus.PENDING and value != ApplicationStatus.PENDING:
-                from datetime import datetime
                 application.reviewed_at = datetime.utcnow()
         setattr(application, field, value)
     
-    db.commit()
-    db.refresh(application)
+    if application.status != previous_status:
+        await adjust_status_counts(db, current_user.id, {previous_status: -1, application.status: 1})
+        await record_status_changes(db, current_user.id, [StatusChange(
+            application.id, application.job_id, previous_status, application.status, application.created_at
+        )])
+        await enqueue_email(
+            db, "application_status",
+            candidate_email=application.candidate.email, job_title=application.job.title,
+            company_name=application.job.company_name, new_status=application.status.value
+        )
+    
+    job = application.job
+    candidate = application.candidate
+    
+    await db.commit()
+    await db.refresh(application)
     
     # Add related info
-    application.job_title = application.job.title
-    application.company_name = application.job.company_name
-    application.candidate_name = application.candidate.name
-    application.candidate_email = application.candidate.email
+    application.job_title = job.title
+    application.company_name = job.company_name
+    application.candidate_name = candidate.name
+    application.candidate_email = candidate.email
     
     return application
 
 @router.get("/employer/all", response_model=List[ApplicationResponse])
 async def get_employer_applications(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     job_id: Optional[int] = Query(None),
     status_filter: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=200)
+    limit: int = Query(50, ge=1, le=200),
+    sort: ApplicantSortEnum = Query(ApplicantSortEnum.NEWEST)
 ):
-    """Get all applications for employer's jobs"""
+    """Get all applications for employer's jobs, newest or best match first"""
     if current_user.user_type != UserType.EMPLOYER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -158,20 +248,30 @@ async def get_employer_applications(
         )
     
     # Base query for applications on employer's jobs
-    query = db.query(Application).options(
+    query = select(Application).options(
         joinedload(Application.job),
         joinedload(Application.candidate)
-    ).join(Job).filter(Job.employer_id == current_user.id)
+    ).join(Job).where(Job.employer_id == current_user.id)
     
     # Apply filters
     if job_id:
-        query = query.filter(Application.job_id == job_id)
+        query = query.where(Application.job_id == job_id)
     
     if status_filter:
-        query = query.filter(Application.status == status_filter)
+        query = query.where(Application.status == status_filter)
+    
+    if sort == ApplicantSortEnum.MATCH:
+        # Only applicants without a cached score are scored; the rest read the column
+        scope = [Job.employer_id == current_user.id] + ([Application.job_id == job_id] if job_id else [])
+        if await ensure_match_scores(db, *scope):
+            await db.commit()
+        query = query.order_by(desc(APPLICATION_MATCH_SORT_KEY), desc(Application.id))
+    else:
+        query = query.order_by(desc(Application.created_at))
     
-    # Order by newest first and apply pagination
-    applications = query.order_by(desc(Application.created_at)).offset(skip).limit(limit).all()
+    # Apply pagination
+    result = await db.execute(query.offset(skip).limit(limit))
+    applications = result.scalars().all()
     
     # Add related info
     for app in applications:
@@ -182,9 +282,151 @@ async def get_employer_applications(
     
     return applications
 
+@router.get("/employer/pipeline", response_model=ApplicationPipelineResponse)
+async def get_employer_pipeline(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    job_id: Optional[int] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
+):
+    """Get the newest applications of every status with per-status totals.
+
+    Each stage's ``next_cursor`` passed back as ``cursor`` returns the next
+    page of that stage alone.
+    """
+    if current_user.user_type != UserType.EMPLOYER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only employers can access this endpoint"
+        )
+    
+    stage_filter = None
+    if cursor:
+        stage_value, cursor_created_at, cursor_id = decode_cursor(cursor, str, datetime, int)
+        try:
+            stage_filter = ApplicationStatus(stage_value)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    # Stage totals are taken before the cursor filter so later pages still report the whole stage
+    stage_rows = (
+        select(
+            Application.id, Application.status, Application.created_at,
+            func.count().over(partition_by=Application.status).label("stage_total")
+        )
+        .join(Job, Job.id == Application.job_id)
+        .where(Job.employer_id == current_user.id)
+    )
+    if job_id:
+        stage_rows = stage_rows.where(Application.job_id == job_id)
+    if stage_filter:
+        stage_rows = stage_rows.where(Application.status == stage_filter)
+    stage_rows = stage_rows.subquery()
+    
+    ranked = select(
+        stage_rows.c.id, stage_rows.c.stage_total,
+        func.row_number().over(
+            partition_by=stage_rows.c.status,
+            order_by=(desc(stage_rows.c.created_at), desc(stage_rows.c.id))
+        ).label("position")
+    )
+    if stage_filter:
+        ranked = ranked.where(
+            tuple_(stage_rows.c.created_at, stage_rows.c.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    ranked = ranked.subquery()
+    
+    # First `limit` rows of every stage, with the job and candidate columns the response needs
+    result = await db.execute(
+        select(Application, ranked.c.stage_total, Job.title, Job.company_name, User.name, User.email)
+        .join(ranked, ranked.c.id == Application.id)
+        .join(Job, Job.id == Application.job_id)
+        .join(User, User.id == Application.candidate_id)
+        .where(ranked.c.position <= limit)
+        .order_by(ranked.c.position)
+    )
+    
+    totals = Counter()
+    stage_applications = {stage: [] for stage in ApplicationStatus}
+    for app, stage_total, job_title, company_name, candidate_name, candidate_email in result.all():
+        app.job_title = job_title
+        app.company_name = company_name
+        app.candidate_name = candidate_name
+        app.candidate_email = candidate_email
+        totals[app.status] = stage_total
+        stage_applications[app.status].append(app)
+    
+    # A page past the end of its stage has no rows to carry the total
+    if stage_filter and not stage_applications[stage_filter]:
+        total_query = (
+            select(func.count(Application.id))
+            .join(Job, Job.id == Application.job_id)
+            .where(Job.employer_id == current_user.id, Application.status == stage_filter)
+        )
+        if job_id:
+            total_query = total_query.where(Application.job_id == job_id)
+        totals[stage_filter] = await db.scalar(total_query)
+    
+    stages = []
+    for stage in ([stage_filter] if stage_filter else ApplicationStatus):
+        applications = stage_applications[stage]
+        next_cursor = None
+        if len(applications) == limit and applications[-1].created_at is not None:
+            next_cursor = encode_cursor(stage.value, applications[-1].created_at, applications[-1].id)
+        stages.append({
+            "status": stage.value,
+            "total": totals[stage],
+            "applications": applications,
+            "next_cursor": next_cursor
+        })
+    
+    return {"stages": stages}
+
+@router.get("/employer/export")
+async def export_employer_applications(
+    current_user: User = Depends(get_current_user),
+    export_format: ExportFormatEnum = Query(ExportFormatEnum.CSV, alias="format"),
+    job_id: Optional[int] = Query(None),
+    status_filter: Optional[ApplicationStatusEnum] = Query(None)
+):
+    """Download every application for employer's jobs as CSV or NDJSON"""
+    if current_user.user_type != UserType.EMPLOYER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only employers can access this endpoint"
+        )
+    
+    # Plain column rows rather than ORM objects, so nothing accumulates in an identity map
+    query = (
+        select(*EXPORT_COLUMNS.values())
+        .join(Job, Job.id == Application.job_id)
+        .join(User, User.id == Application.candidate_id)
+        .where(Job.employer_id == current_user.id)
+    )
+    
+    if job_id:
+        query = query.where(Application.job_id == job_id)
+    
+    if status_filter:
+        query = query.where(Application.status == ApplicationStatus(status_filter.value))
+    
+    query = query.order_by(desc(Application.created_at), desc(Application.id))
+    
+    media_type = "text/csv" if export_format == ExportFormatEnum.CSV else "application/x-ndjson"
+    filename = f"applications.{export_format.value}"
+    return StreamingResponse(
+        _stream_export(query, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/employer/stats")
 async def get_employer_application_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get application statistics for employer"""
@@ -194,25 +436,83 @@ async def get_employer_application_stats(
             detail="Only employers can access this endpoint"
         )
     
-    # Get stats for all applications on employer's jobs
-    base_query = db.query(Application).join(Job).filter(Job.employer_id == current_user.id)
+    # Counters are maintained alongside every application write, so this reads one row per status
+    counts = await get_status_counts(db, current_user.id)
+    
+    return {
+        "total_applications": sum(counts.values()),
+        "pending_applications": counts[ApplicationStatus.PENDING],
+        "reviewed_applications": counts[ApplicationStatus.REVIEWED],
+        "shortlisted_applications": counts[ApplicationStatus.SHORTLISTED],
+        "interviewed_applications": counts[ApplicationStatus.INTERVIEW_SCHEDULED] + counts[ApplicationStatus.INTERVIEWED],
+        "offered_applications": counts[ApplicationStatus.OFFERED]
+    }
+
+@router.get("/employer/funnel", response_model=ApplicationFunnelResponse)
+async def get_employer_application_funnel(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    job_id: Optional[int] = Query(None),
+    days: int = Query(90, ge=1, le=730)
+):
+    """Get stage transitions and median time in each stage for employer's jobs"""
+    if current_user.user_type != UserType.EMPLOYER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only employers can access this endpoint"
+        )
+    
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
     
-    total_applications = base_query.count()
-    pending_applications = base_query.filter(Application.status == ApplicationStatus.PENDING).count()
-    reviewed_applications = base_query.filter(Application.status == ApplicationStatus.REVIEWED).count()
-    shortlisted_applications = base_query.filter(Application.status == ApplicationStatus.SHORTLISTED).count()
-    interviewed_applications = base_query.filter(
-        Application.status.in_([ApplicationStatus.INTERVIEW_SCHEDULED, ApplicationStatus.INTERVIEWED])
-    ).count()
-    offered_applications = base_query.filter(Application.status == ApplicationStatus.OFFERED).count()
+    # Reads only the daily rollup, which application_funnel_rollup keeps current
+    query = (
+        select(
+            ApplicationTransitionDaily.from_status, ApplicationTransitionDaily.to_status,
+            ApplicationTransitionDaily.duration_bucket, func.sum(ApplicationTransitionDaily.count)
+        )
+        .where(ApplicationTransitionDaily.employer_id == current_user.id, ApplicationTransitionDaily.day >= since)
+        .group_by(
+            ApplicationTransitionDaily.from_status, ApplicationTransitionDaily.to_status,
+            ApplicationTransitionDaily.duration_bucket
+        )
+    )
+    if job_id:
+        query = query.where(ApplicationTransitionDaily.job_id == job_id)
+    result = await db.execute(query)
+    
+    transitions = Counter()
+    entered = Counter()
+    exited = Counter()
+    stay_buckets = {stage: Counter() for stage in ApplicationStatus}
+    for from_status, to_status, bucket, count in result.all():
+        count = int(count)
+        transitions[(from_status, to_status)] += count
+        entered[to_status] += count
+        if from_status is not None:
+            exited[from_status] += count
+            if bucket is not None:
+                stay_buckets[from_status][bucket] += count
     
     return {
-        "total_applications": total_applications,
-        "pending_applications": pending_applications,
-        "reviewed_applications": reviewed_applications,
-        "shortlisted_applications": shortlisted_applications,
-        "interviewed_applications": interviewed_applications,
-        "offered_applications": offered_applications
+        "since": since,
+        "job_id": job_id,
+        "stages": [
+            {
+                "status": stage.value,
+                "entered": entered[stage],
+                "exited": exited[stage],
+                "median_seconds_in_stage": median_seconds(stay_buckets[stage])
+            }
+            for stage in ApplicationStatus
+        ],
+        "transitions": [
+            {
+                "from_status": from_status.value if from_status else None,
+                "to_status": to_status.value,
+                "count": count
+            }
+            for (from_status, to_status), count in transitions.most_common()
+        ]
     }
 
 # Bulk operations
@@ -220,7 +520,7 @@ async def get_employer_application_stats(
 async def bulk_update_applications(
     application_ids: List[int],
     status_update: ApplicationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Bulk update application statuses"""
@@ -230,34 +530,83 @@ async def bulk_update_applications(
             detail="Only employers can bulk update applications"
         )
     
-    # Get applications and verify ownership
-    applications = db.query(Application).join(Job).filter(
-        and_(
-            Application.id.in_(application_ids),
-            Job.employer_id == current_user.id
+    update_data = status_update.dict(exclude_unset=True)
+    if update_data.get('status') is not None:
+        update_data['status'] = ApplicationStatus(update_data['status'])
+    else:
+        update_data.pop('status', None)
+    
+    requested_ids = set(application_ids)
+    owned = and_(
+        Application.id.in_(requested_ids),
+        Application.job_id == Job.id,
+        Job.employer_id == current_user.id
+    )
+    
+    new_status = update_data.get('status')
+    if new_status is not None and new_status != ApplicationStatus.PENDING:
+        # Set reviewed timestamp when status changes from pending; SET sees the pre-update row
+        update_data['reviewed_at'] = case(
+            (Application.status == ApplicationStatus.PENDING, func.now()),
+            else_=Application.reviewed_at
+        )
+    
+    if update_data:
+        # One UPDATE ... FROM jobs for the whole batch. Joining a second copy of the row
+        # lets RETURNING report the status each application had before the update.
+        previous = aliased(Application)
+        result = await db.execute(
+            update(Application)
+            .where(owned, previous.id == Application.id)
+            .values(**update_data)
+            .returning(Application.id, previous.status, Application.job_id, Application.created_at)
+            .execution_options(synchronize_session=False)
         )
-    ).all()
+        updated = result.all()
+    else:
+        result = await db.execute(
+            select(Application.id, Application.status, Application.job_id, Application.created_at).where(owned)
+        )
+        updated = result.all()
     
-    if len(applications) != len(application_ids):
+    missing_ids = sorted(requested_ids - {application_id for application_id, *_ in updated})
+    if missing_ids:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Some applications not found or not owned by you"
+            detail=f"Some applications not found or not owned by you: {missing_ids}"
         )
     
-    # Update all applications
-    update_data = status_update.dict(exclude_unset=True)
-    updated_count = 0
-    
-    for application in applications:
-        for field, value in update_data.items():
-            if field == 'status':
-                # Set reviewed timestamp when status changes from pending
-                if application.status == ApplicationStatus.PENDING and value != ApplicationStatus.PENDING:
-                    from datetime import datetime
-                    application.reviewed_at = datetime.utcnow()
-            setattr(application, field, value)
-        updated_count += 1
-    
-    db.commit()
+    if new_status is not None:
+        status_deltas = Counter()
+        for _, previous_status, _, _ in updated:
+            status_deltas[previous_status] -= 1
+            status_deltas[new_status] += 1
+        await adjust_status_counts(db, current_user.id, status_deltas)
+        await record_status_changes(db, current_user.id, [
+            StatusChange(application_id, job_id, previous_status, new_status, applied_at)
+            for application_id, previous_status, job_id, applied_at in updated
+        ])
+        
+        # Notify only candidates whose status actually changed
+        changed_ids = [application_id for application_id, previous_status, _, _ in updated if previous_status != new_status]
+        if changed_ids:
+            result = await db.execute(
+                select(User.email, Job.title, Job.company_name)
+                .select_from(Application)
+                .join(Job, Job.id == Application.job_id)
+                .join(User, User.id == Application.candidate_id)
+                .where(Application.id.in_(changed_ids))
+            )
+            await enqueue_emails(db, "application_status", [
+                {
+                    "candidate_email": candidate_email, "job_title": job_title,
+                    "company_name": company_name, "new_status": new_status.value
+                }
+                for candidate_email, job_title, company_name in result.all()
+            ])
+    
+    await db.commit()
+    updated_count = len(updated)
     
     return {"message": f"Successfully updated {updated_count} applications"}
\ No newline at end of file
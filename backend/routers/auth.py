@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.user import User, UserType as ModelUserType
+from models.application import Application
 from schemas.user import (
     CandidateRegistrationRequest,
     EmployerRegistrationRequest,
@@ -21,18 +23,24 @@ from auth.security import (
     create_refresh_token,
 )
 from auth.dependencies import get_current_active_user, get_current_user
+from utils.skills import sync_candidate_skills
+from utils.applicant_matching import CANDIDATE_MATCH_FIELDS, invalidate_match_scores
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
+# Profile fields mirrored into the candidate_skills index
+SKILL_FIELDS = ("skills", "technical_skills")
+
 
 @router.post("/register/candidate", response_model=dict)
 async def register_candidate(
-    user_data: CandidateRegistrationRequest, db: Session = Depends(get_db)
+    user_data: CandidateRegistrationRequest,
+    db: AsyncSession = Depends(get_db),
 ):
     """Register a new candidate"""
     # Check if user already exists
-    existing_user = (
-        db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(
+        select(User).where(User.email == user_data.email)
     )
     if existing_user:
         raise HTTPException(
@@ -55,14 +63,15 @@ async def register_candidate(
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     # Calculate initial profile completion
     db_user.profile_completion_percentage = (
         calculate_candidate_profile_completion(db_user)
     )
-    db.commit()
+    await sync_candidate_skills(db, db_user)
+    await db.commit()
 
     return {
         "message": "Candidate registered successfully",
@@ -72,12 +81,13 @@ async def register_candidate(
 
 @router.post("/register/employer", response_model=dict)
 async def register_employer(
-    user_data: EmployerRegistrationRequest, db: Session = Depends(get_db)
+    user_data: EmployerRegistrationRequest,
+    db: AsyncSession = Depends(get_db),
 ):
     """Register a new employer"""
     # Check if user already exists
-    existing_user = (
-        db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(
+        select(User).where(User.email == user_data.email)
     )
     if existing_user:
         raise HTTPException(
@@ -100,14 +110,14 @@ async def register_employer(
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     # Calculate initial profile completion
     db_user.profile_completion_percentage = (
         calculate_employer_profile_completion(db_user)
     )
-    db.commit()
+    await db.commit()
 
     return {
         "message": "Employer registered successfully",
@@ -116,10 +126,14 @@ async def register_employer(
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(
+    login_data: LoginRequest, db: AsyncSession = Depends(get_db)
+):
     """Login user and return JWT tokens"""
     # Find user by email
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = await db.scalar(
+        select(User).where(User.email == login_data.email)
+    )
 
     if not user or not verify_password(
         login_data.password, user.hashed_password
@@ -157,12 +171,13 @@ async def get_current_user_info(
 
 @router.post("/register/admin", response_model=dict)
 async def register_admin(
-    user_data: AdminRegistrationRequest, db: Session = Depends(get_db)
+    user_data: AdminRegistrationRequest,
+    db: AsyncSession = Depends(get_db),
 ):
     """Register a new admin (typically restricted in production)"""
     # Check if user already exists
-    existing_user = (
-        db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(
+        select(User).where(User.email == user_data.email)
     )
     if existing_user:
         raise HTTPException(
@@ -182,8 +197,8 @@ async def register_admin(
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return {"message": "Admin registered successfully", "user_id": db_user.id}
 
@@ -198,7 +213,7 @@ async def logout():
 @router.put("/profile", response_model=UserResponse)
 async def update_profile(
     profile_data: ProfileUpdateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update user profile"""
@@ -287,8 +302,18 @@ async def update_profile(
                 else:
                     setattr(current_user, field, value)
 
-    db.commit()
-    db.refresh(current_user)
+    if current_user.user_type == ModelUserType.CANDIDATE and any(
+        field in update_data for field in SKILL_FIELDS
+    ):
+        await sync_candidate_skills(db, current_user)
+
+    if current_user.user_type == ModelUserType.CANDIDATE and any(
+        field in update_data for field in CANDIDATE_MATCH_FIELDS
+    ):
+        await invalidate_match_scores(db, Application.candidate_id == current_user.id)
+
+    await db.commit()
+    await db.refresh(current_user)
 
     return current_user
 
@@ -296,7 +321,7 @@ async def update_profile(
 @router.put("/profile/advanced/candidate", response_model=UserResponse)
 async def update_advanced_candidate_profile(
     profile_data: AdvancedCandidateProfileUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update advanced candidate profile fields"""
@@ -399,8 +424,14 @@ async def update_advanced_candidate_profile(
         calculate_candidate_profile_completion(current_user)
     )
 
-    db.commit()
-    db.refresh(current_user)
+    if any(field in update_data for field in SKILL_FIELDS):
+        await sync_candidate_skills(db, current_user)
+
+    if any(field in update_data for field in CANDIDATE_MATCH_FIELDS):
+        await invalidate_match_scores(db, Application.candidate_id == current_user.id)
+
+    await db.commit()
+    await db.refresh(current_user)
 
     return current_user
 
@@ -408,7 +439,7 @@ async def update_advanced_candidate_profile(
 @router.put("/profile/advanced/employer", response_model=UserResponse)
 async def update_advanced_employer_profile(
     profile_data: AdvancedEmployerProfileUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Update advanced employer profile fields"""
@@ -488,8 +519,8 @@ async def update_advanced_employer_profile(
         calculate_employer_profile_completion(current_user)
     )
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     return current_user
 
@@ -1,94 +1,339 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, or_, and_
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from pydantic import ValidationError
+from sqlalchemy import desc, or_, case, func, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
+from config import settings
 from models.job import Job, JobStatus, EmploymentType, LocationType
-from models.application import Application, ApplicationStatus
+from models.application import Application, ApplicationStatus, APPLICATION_MATCH_SORT_KEY
 from models.user import User, UserType
+from models.skill import CandidateSkill
+from models.message import Message
 from schemas.job import (
     JobCreate, JobUpdate, JobResponse, JobListItem, 
     ApplicationCreate, ApplicationResponse, ApplicationUpdate,
-    JobStatusEnum, EmploymentTypeEnum, LocationTypeEnum
+    JobStatusEnum, EmploymentTypeEnum, LocationTypeEnum, JobSortEnum,
+    JobFacetsResponse, JobImportFormatEnum, JobBulkImportResponse, ApplicationStatusEnum, ApplicantSortEnum
 )
-from auth.dependencies import get_current_user
-from typing import List, Optional
+from auth.dependencies import get_current_user, get_optional_user_id
+from utils.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from utils.cache import TTLCache
+from utils.view_counter import view_counter, client_ip, visitor_key, load_unique_views
+from utils.skills import parse_skills, sync_job_skills, add_job_skills, jobs_with_all_skills
+from utils.recommendations import job_matrix
+from utils.application_funnel import StatusChange, record_status_changes
+from utils.applicant_matching import JOB_MATCH_FIELDS, ensure_match_scores, invalidate_match_scores
+from utils.email_outbox import enqueue_email
+from utils.conversations import delete_messages
+from utils.message_hub import message_hub
+from utils.application_counts import (
+    adjust_status_counts, count_applications_by_status, increment_application_count, load_application_counts
+)
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
+import csv
+import enum
+import io
+import json
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
-# Public job endpoints
-@router.get("", response_model=List[JobListItem])
-async def get_jobs(
-    db: Session = Depends(get_db),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
-    search: Optional[str] = Query(None),
-    location: Optional[str] = Query(None),
-    employment_type: Optional[EmploymentTypeEnum] = Query(None),
-    location_type: Optional[LocationTypeEnum] = Query(None),
-    experience_level: Optional[str] = Query(None),
-    salary_min: Optional[float] = Query(None, ge=0),
-    company: Optional[str] = Query(None)
+# Facet counts are cheap to serve slightly stale and are requested on every search page
+FACET_CACHE_TTL_SECONDS = 30
+_facet_cache = TTLCache(maxsize=1024, ttl=FACET_CACHE_TTL_SECONDS)
+
+# Bulk imports are validated and inserted this many rows at a time
+BULK_IMPORT_BATCH_SIZE = 1000
+MAX_BULK_IMPORT_ROWS = 10000
+
+SALARY_BANDS = (
+    (50000, "under_50k"),
+    (100000, "50k_100k"),
+    (150000, "100k_150k"),
+)
+
+def apply_job_filters(
+    query,
+    search: Optional[str] = None,
+    location: Optional[str] = None,
+    employment_type: Optional[EmploymentTypeEnum] = None,
+    location_type: Optional[LocationTypeEnum] = None,
+    experience_level: Optional[str] = None,
+    salary_min: Optional[float] = None,
+    company: Optional[str] = None,
+    skills: Optional[str] = None
 ):
-    """Get all active jobs with filtering and search"""
-    query = db.query(Job).filter(Job.status == JobStatus.ACTIVE)
+    """Restrict a jobs query to active jobs matching the public search filters.
+
+    Returns the filtered query and the tsquery used for ``search`` (or None).
+    """
+    query = query.where(Job.status == JobStatus.ACTIVE)
     
-    # Apply filters
+    ts_query = None
     if search:
-        query = query.filter(
-            or_(
-                Job.title.ilike(f"%{search}%"),
-                Job.description.ilike(f"%{search}%"),
-                Job.required_skills.ilike(f"%{search}%")
-            )
-        )
+        # Matches against the GIN-indexed search_vector instead of scanning with ILIKE
+        ts_query = func.websearch_to_tsquery('english', search)
+        query = query.where(Job.search_vector.op('@@')(ts_query))
     
     if location:
-        query = query.filter(Job.location.ilike(f"%{location}%"))
+        query = query.where(Job.location.ilike(f"%{location}%"))
     
     if employment_type:
-        query = query.filter(Job.employment_type == employment_type)
+        query = query.where(Job.employment_type == employment_type)
         
     if location_type:
-        query = query.filter(Job.location_type == location_type)
+        query = query.where(Job.location_type == location_type)
         
     if experience_level:
-        query = query.filter(Job.experience_level.ilike(f"%{experience_level}%"))
+        query = query.where(Job.experience_level.ilike(f"%{experience_level}%"))
         
     if salary_min:
-        query = query.filter(Job.salary_min >= salary_min)
+        query = query.where(Job.salary_min >= salary_min)
         
     if company:
-        query = query.filter(Job.company_name.ilike(f"%{company}%"))
+        query = query.where(Job.company_name.ilike(f"%{company}%"))
+    
+    skill_names = parse_skills(skills)
+    if skill_names:
+        # Jobs carrying every requested skill, resolved through the job_skills index
+        query = query.where(Job.id.in_(jobs_with_all_skills(skill_names)))
+    
+    return query, ts_query
+
+def _iter_import_rows(file, import_format: JobImportFormatEnum) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, row, parse error) for each record of an uploaded CSV or NDJSON file"""
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if import_format == JobImportFormatEnum.CSV:
+        reader = csv.DictReader(text_file)
+        for row in reader:
+            # Blank cells fall back to the JobCreate defaults; cells past the header are dropped
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, "")}, None
+    else:
+        for line_number, line in enumerate(text_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, "Each line must be a JSON object"
+                continue
+            yield line_number, row, None
+
+def _normalize_filter(value: Optional[str]) -> Optional[str]:
+    """Normalize a free-text filter so equivalent searches share a cache entry"""
+    return value.strip().lower() if value and value.strip() else None
+
+# Public job endpoints
+@router.get("", response_model=List[JobListItem])
+async def get_jobs(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    location: Optional[str] = Query(None),
+    employment_type: Optional[EmploymentTypeEnum] = Query(None),
+    location_type: Optional[LocationTypeEnum] = Query(None),
+    experience_level: Optional[str] = Query(None),
+    salary_min: Optional[float] = Query(None, ge=0),
+    company: Optional[str] = Query(None),
+    skills: Optional[str] = Query(None, description="Comma-separated skills; jobs must require all of them"),
+    sort: JobSortEnum = Query(JobSortEnum.NEWEST)
+):
+    """Get all active jobs with filtering and search.
+
+    Newest-first listings support keyset paging: pass the X-Next-Cursor
+    header of one page as ``cursor`` to fetch the next. ``skip`` is still
+    honoured for offset paging and for relevance-sorted searches.
+    """
+    query, ts_query = apply_job_filters(
+        select(Job), search, location, employment_type, location_type,
+        experience_level, salary_min, company, skills
+    )
     
-    # Order by newest first
-    query = query.order_by(desc(Job.created_at))
+    # Order by relevance when searching, newest first otherwise
+    keyset = not (sort == JobSortEnum.RELEVANCE and ts_query is not None)
+    if keyset:
+        # Matches ix_jobs_status_created_at_id so deep pages stay index-only seeks
+        query = query.order_by(desc(Job.created_at), desc(Job.id))
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor, datetime, int)
+            query = query.where(tuple_(Job.created_at, Job.id) < tuple_(cursor_created_at, cursor_id))
+    else:
+        query = query.order_by(desc(func.ts_rank(Job.search_vector, ts_query)), desc(Job.created_at))
     
     # Apply pagination
-    jobs = query.offset(skip).limit(limit).all()
+    if not (keyset and cursor):
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    jobs = result.scalars().all()
+    
+    if keyset and len(jobs) == limit and jobs[-1].created_at is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(jobs[-1].created_at, jobs[-1].id)
+    
+    await load_application_counts(db, jobs)
+    
+    return jobs
+
+@router.get("/facets", response_model=JobFacetsResponse)
+async def get_job_facets(
+    db: AsyncSession = Depends(get_db),
+    search: Optional[str] = Query(None),
+    location: Optional[str] = Query(None),
+    employment_type: Optional[EmploymentTypeEnum] = Query(None),
+    location_type: Optional[LocationTypeEnum] = Query(None),
+    experience_level: Optional[str] = Query(None),
+    salary_min: Optional[float] = Query(None, ge=0),
+    company: Optional[str] = Query(None),
+    skills: Optional[str] = Query(None, description="Comma-separated skills; jobs must require all of them")
+):
+    """Get filter-chip counts for active jobs matching the same filters as get_jobs"""
+    cache_key = (
+        _normalize_filter(search),
+        _normalize_filter(location),
+        employment_type.value if employment_type else None,
+        location_type.value if location_type else None,
+        _normalize_filter(experience_level),
+        salary_min or None,
+        _normalize_filter(company),
+        tuple(sorted(parse_skills(skills))),
+    )
+    cached = _facet_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    salary_band = case(
+        (Job.salary_min.is_(None), "unspecified"),
+        *[(Job.salary_min < upper, band) for upper, band in SALARY_BANDS],
+        else_="150k_plus"
+    )
+    facet_columns = {
+        "employment_type": Job.employment_type,
+        "location_type": Job.location_type,
+        "experience_level": Job.experience_level,
+        "salary_band": salary_band,
+    }
+    
+    # One pass over the filtered jobs: a grouping set per facet plus () for the total
+    query = select(
+        *facet_columns.values(),
+        *[func.grouping(column) for column in facet_columns.values()],
+        func.count()
+    ).group_by(
+        func.grouping_sets(*[tuple_(column) for column in facet_columns.values()], text("()"))
+    )
+    query, _ = apply_job_filters(
+        query, search, location, employment_type, location_type,
+        experience_level, salary_min, company, skills
+    )
+    
+    facets = {name: [] for name in facet_columns}
+    total = 0
+    names = list(facet_columns)
+    for row in (await db.execute(query)).all():
+        values, grouped, count = row[:len(names)], row[len(names):-1], row[-1]
+        if all(grouped):
+            total = count
+            continue
+        index = grouped.index(0)
+        value = values[index]
+        if value is None:
+            value = "unspecified"
+        elif isinstance(value, enum.Enum):
+            value = value.value
+        facets[names[index]].append({"value": value, "count": count})
+    
+    for counts in facets.values():
+        counts.sort(key=lambda item: item["count"], reverse=True)
+    
+    result = {"total": total, **facets}
+    _facet_cache.set(cache_key, result)
+    return result
+
+@router.get("/recommended", response_model=List[JobListItem])
+async def get_recommended_jobs(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Get active jobs ranked by how well they match the candidate's profile"""
+    if current_user.user_type != UserType.CANDIDATE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only candidates can get job recommendations"
+        )
+    
+    await job_matrix.ensure_fresh(db)
+    
+    result = await db.execute(
+        select(CandidateSkill.skill_id).where(CandidateSkill.candidate_id == current_user.id)
+    )
+    scores = job_matrix.score(
+        result.scalars().all(),
+        expected_salary=current_user.expected_salary,
+        preferred_work_type=current_user.preferred_work_type,
+        experience_level=current_user.experience_level
+    )
+    ranked = job_matrix.top(scores, skip, limit)
+    if not ranked:
+        return []
+    
+    # The matrix can lag other workers by a refresh interval, so re-check status here
+    result = await db.execute(
+        select(Job).where(Job.id.in_([job_id for job_id, _ in ranked]), Job.status == JobStatus.ACTIVE)
+    )
+    jobs_by_id = {job.id: job for job in result.scalars().all()}
+    
+    jobs = []
+    for job_id, score in ranked:
+        job = jobs_by_id.get(job_id)
+        if job is not None:
+            job.match_score = round(score, 4)
+            jobs.append(job)
+    
+    await load_application_counts(db, jobs)
     
     return jobs
 
 @router.get("/{job_id}", response_model=JobResponse)
-async def get_job(job_id: int, db: Session = Depends(get_db)):
+async def get_job(
+    job_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user_id: Optional[int] = Depends(get_optional_user_id)
+):
     """Get job details by ID"""
-    job = db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.ACTIVE).first()
+    job = await db.scalar(select(Job).where(Job.id == job_id, Job.status == JobStatus.ACTIVE))
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found"
         )
     
-    # Increment view count
-    job.views_count += 1
-    db.commit()
+    # Buffered and written in batches, so detail views stay read-only
+    viewer_ip = client_ip(
+        request.client.host if request.client else None,
+        request.headers.get("x-forwarded-for"),
+        settings.TRUSTED_PROXIES
+    )
+    view_counter.record(job.id, visitor_key(user_id, viewer_ip))
+    
+    job.unique_views = (await load_unique_views(db, [job.id]))[job.id]
+    await load_application_counts(db, [job])
     
     return job
 
 # Employer job management endpoints
 @router.get("/employer/my-jobs", response_model=List[JobListItem])
 async def get_employer_jobs(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     status_filter: Optional[JobStatusEnum] = Query(None)
 ):
@@ -99,18 +344,25 @@ async def get_employer_jobs(
             detail="Only employers can access this endpoint"
         )
     
-    query = db.query(Job).filter(Job.employer_id == current_user.id)
+    query = select(Job).where(Job.employer_id == current_user.id)
     
     if status_filter:
-        query = query.filter(Job.status == status_filter)
+        query = query.where(Job.status == status_filter)
+    
+    result = await db.execute(query.order_by(desc(Job.created_at)))
+    jobs = result.scalars().all()
+    
+    unique_views = await load_unique_views(db, [job.id for job in jobs])
+    for job in jobs:
+        job.unique_views = unique_views[job.id]
+    await load_application_counts(db, jobs)
     
-    jobs = query.order_by(desc(Job.created_at)).all()
     return jobs
 
 @router.post("", response_model=JobResponse)
 async def create_job(
     job_data: JobCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new job posting"""
@@ -127,20 +379,134 @@ async def create_job(
     )
     
     db.add(job)
-    db.commit()
-    db.refresh(job)
+    await db.flush()
+    await sync_job_skills(db, job.id, job.required_skills)
+    await db.commit()
+    await db.refresh(job)
+    job_matrix.mark_stale()
     
     return job
 
+@router.post("/bulk", response_model=JobBulkImportResponse)
+async def bulk_create_jobs(
+    file: UploadFile = File(...),
+    import_format: Optional[JobImportFormatEnum] = Query(None, alias="format"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create job postings in bulk from a CSV or NDJSON upload.
+
+    Each record is validated against JobCreate. Valid rows are inserted in
+    multi-row batches; invalid rows are reported by line number and skipped.
+    """
+    if current_user.user_type != UserType.EMPLOYER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only employers can create job postings"
+        )
+    
+    if import_format is None:
+        filename = (file.filename or "").lower()
+        if filename.endswith(".csv") or file.content_type == "text/csv":
+            import_format = JobImportFormatEnum.CSV
+        elif filename.endswith((".ndjson", ".jsonl")) or file.content_type in ("application/x-ndjson", "application/jsonl"):
+            import_format = JobImportFormatEnum.NDJSON
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown file format. Upload a .csv or .ndjson file or pass format=csv|ndjson"
+            )
+    
+    company_name = current_user.company_name or "Unknown Company"
+    job_ids = []
+    errors = []
+    batch = []
+    
+    async def insert_rows(rows):
+        # One multi-row INSERT; ids come back in row order
+        result = await db.execute(
+            insert(Job).returning(Job.id, sort_by_parameter_order=True),
+            [job for _, job in rows]
+        )
+        ids = result.scalars().all()
+        await add_job_skills(db, {job_id: job["required_skills"] for job_id, (_, job) in zip(ids, rows)})
+        return ids
+    
+    async def insert_batch():
+        # Each batch runs in a SAVEPOINT so a database error cannot abort the whole import
+        try:
+            async with db.begin_nested():
+                ids = await insert_rows(batch)
+            job_ids.extend(ids)
+        except DBAPIError:
+            # Retry row by row to pin the failure on its input line
+            for line_number, job in batch:
+                try:
+                    async with db.begin_nested():
+                        ids = await insert_rows([(line_number, job)])
+                    job_ids.extend(ids)
+                except DBAPIError as e:
+                    errors.append({"row": line_number, "errors": [f"Database rejected row: {e.orig}"]})
+        batch.clear()
+    
+    try:
+        row_count = 0
+        for line_number, row, parse_error in _iter_import_rows(file.file, import_format):
+            row_count += 1
+            if row_count > MAX_BULK_IMPORT_ROWS:
+                errors.append({
+                    "row": line_number,
+                    "errors": [f"Imports are limited to {MAX_BULK_IMPORT_ROWS} rows; this and later rows were skipped"]
+                })
+                break
+            
+            if parse_error:
+                errors.append({"row": line_number, "errors": [parse_error]})
+                continue
+            
+            try:
+                job_data = JobCreate(**row)
+            except ValidationError as e:
+                errors.append({
+                    "row": line_number,
+                    "errors": [f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()]
+                })
+                continue
+            
+            batch.append((line_number, {**job_data.dict(), "employer_id": current_user.id, "company_name": company_name}))
+            if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+                await insert_batch()
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read file: {e}"
+        )
+    
+    if batch:
+        await insert_batch()
+    
+    await db.commit()
+    if job_ids:
+        job_matrix.mark_stale()
+    
+    # Database errors are found a batch later than validation errors
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "created": len(job_ids),
+        "failed": len(errors),
+        "job_ids": job_ids,
+        "errors": errors
+    }
+
 @router.put("/{job_id}", response_model=JobResponse)
 async def update_job(
     job_id: int,
     job_data: JobUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a job posting"""
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.scalar(select(Job).where(Job.id == job_id))
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,19 +528,27 @@ async def update_job(
     if job_data.status == JobStatusEnum.ACTIVE and job.published_at is None:
         job.published_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(job)
+    if "required_skills" in update_data:
+        await sync_job_skills(db, job.id, job.required_skills)
+    
+    if any(field in update_data for field in JOB_MATCH_FIELDS):
+        await invalidate_match_scores(db, Application.job_id == job.id)
+    
+    await db.commit()
+    await db.refresh(job)
+    await load_application_counts(db, [job])
+    job_matrix.mark_stale()
     
     return job
 
 @router.delete("/{job_id}")
 async def delete_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a job posting"""
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.scalar(select(Job).where(Job.id == job_id))
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -187,8 +561,26 @@ async def delete_job(
             detail="You can only delete your own job postings"
         )
     
-    db.delete(job)
-    db.commit()
+    # The job's applications are deleted with it, so take them off the employer's counters
+    status_counts = await count_applications_by_status(db, Application.job_id == job.id)
+    await adjust_status_counts(
+        db, job.employer_id, {application_status: -count for application_status, count in status_counts.items()}
+    )
+    
+    # Its messages would be cascaded away too; delete them first so the conversations they summarize stay right
+    participants = await delete_messages(db, or_(
+        Message.job_id == job.id,
+        Message.application_id.in_(select(Application.id).where(Application.job_id == job.id))
+    ))
+    event = {"type": "messages_deleted", "job_id": job_id}
+    if participants:
+        await message_hub.notify(db, participants, event)
+    
+    await db.delete(job)
+    await db.commit()
+    job_matrix.discard(job_id)
+    if participants:
+        message_hub.publish(participants, event)
     
     return {"message": "Job deleted successfully"}
 
@@ -197,7 +589,7 @@ async def delete_job(
 async def apply_to_job(
     job_id: int,
     application_data: ApplicationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Apply to a job"""
@@ -208,50 +600,68 @@ async def apply_to_job(
         )
     
     # Check if job exists and is active
-    job = db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.ACTIVE).first()
-    if not job:
+    job = (await db.execute(
+        select(Job.employer_id, Job.title, User.email)
+        .join(User, User.id == Job.employer_id)
+        .where(Job.id == job_id, Job.status == JobStatus.ACTIVE)
+    )).first()
+    if job is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found or no longer active"
         )
     
-    # Check if already applied
-    existing_application = db.query(Application).filter(
-        Application.job_id == job_id,
-        Application.candidate_id == current_user.id
-    ).first()
+    # Create application; the unique (job_id, candidate_id) constraint catches repeat applications
+    application = await db.scalar(
+        pg_insert(Application)
+        .values(
+            job_id=job_id,
+            candidate_id=current_user.id,
+            cover_letter=application_data.cover_letter,
+            additional_notes=application_data.additional_notes
+        )
+        .on_conflict_do_nothing(index_elements=[Application.job_id, Application.candidate_id])
+        .returning(Application)
+    )
     
-    if existing_application:
+    if application is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have already applied to this job"
         )
     
-    # Create application
-    application = Application(
-        job_id=job_id,
-        candidate_id=current_user.id,
-        cover_letter=application_data.cover_letter,
-        additional_notes=application_data.additional_notes
+    # Increment application counts on sharded rows instead of the hot jobs row
+    await increment_application_count(db, job_id)
+    await adjust_status_counts(db, job.employer_id, {ApplicationStatus.PENDING: 1})
+    await record_status_changes(db, job.employer_id, [
+        StatusChange(application.id, job_id, None, ApplicationStatus.PENDING)
+    ])
+    
+    # Delivered by the email outbox worker once this transaction commits
+    await enqueue_email(
+        db, "job_application",
+        employer_email=job.email, job_title=job.title, candidate_name=current_user.name
     )
     
-    db.add(application)
-    
-    # Increment application count
-    job.applications_count += 1
-    
-    db.commit()
-    db.refresh(application)
+    await db.commit()
     
     return application
 
 @router.get("/{job_id}/applications", response_model=List[ApplicationResponse])
 async def get_job_applications(
     job_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    status_filter: Optional[ApplicationStatusEnum] = Query(None),
+    sort: ApplicantSortEnum = Query(ApplicantSortEnum.NEWEST)
 ):
-    """Get applications for a job (employer only)"""
+    """Get applications for a job (employer only), newest or best match first.
+
+    Pass the X-Next-Cursor header of one page as ``cursor`` to fetch the next.
+    """
     if current_user.user_type != UserType.EMPLOYER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -259,20 +669,58 @@ async def get_job_applications(
         )
     
     # Check if job belongs to current employer
-    job = db.query(Job).filter(Job.id == job_id, Job.employer_id == current_user.id).first()
+    job = (await db.execute(
+        select(Job.title, Job.company_name).where(Job.id == job_id, Job.employer_id == current_user.id)
+    )).first()
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found"
         )
     
-    applications = db.query(Application).filter(Application.job_id == job_id).all()
+    # Join in just the candidate columns the response needs instead of loading each User
+    query = (
+        select(Application, User.name, User.email)
+        .join(User, User.id == Application.candidate_id)
+        .where(Application.job_id == job_id)
+    )
+    if status_filter:
+        query = query.where(Application.status == ApplicationStatus(status_filter.value))
+    
+    if sort == ApplicantSortEnum.MATCH:
+        # Only applicants without a cached score are scored; the rest read the column
+        if await ensure_match_scores(db, Application.job_id == job_id):
+            await db.commit()
+        
+        # Matches ix_applications_job_match_score_id
+        query = query.order_by(desc(APPLICATION_MATCH_SORT_KEY), desc(Application.id))
+        if cursor:
+            cursor_score, cursor_id = decode_cursor(cursor, float, int)
+            query = query.where(tuple_(APPLICATION_MATCH_SORT_KEY, Application.id) < tuple_(cursor_score, cursor_id))
+    else:
+        # Matches ix_applications_job_created_at_id
+        query = query.order_by(desc(Application.created_at), desc(Application.id))
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor, datetime, int)
+            query = query.where(tuple_(Application.created_at, Application.id) < tuple_(cursor_created_at, cursor_id))
+    
+    result = await db.execute(query.limit(limit))
     
     # Add candidate and job info to applications
-    for app in applications:
+    applications = []
+    for app, candidate_name, candidate_email in result.all():
         app.job_title = job.title
         app.company_name = job.company_name
-        app.candidate_name = app.candidate.name
-        app.candidate_email = app.candidate.email
-    
-    return applications
\ No newline at end of file
+        app.candidate_name = candidate_name
+        app.candidate_email = candidate_email
+        applications.append(app)
+    
+    if len(applications) == limit:
+        last = applications[-1]
+        if sort == ApplicantSortEnum.MATCH:
+            sort_value = last.match_score if last.match_score is not None else -1.0
+        else:
+            sort_value = last.created_at
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_value, last.id)
+    
+    return applications
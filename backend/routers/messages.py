@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, WebSocket
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Float, and_, or_, case, desc, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
-from database import get_db
-from models.message import Message
-from models.user import User
+from database import get_db, AsyncSessionLocal
+from models.message import Message, MESSAGE_SEARCH_CONFIG
+from models.conversation import Conversation
+from models.user import User, UserType
 from models.job import Job
 from models.application import Application
 from auth.dependencies import get_current_user
+from auth.security import verify_token
+from utils.conversations import (
+    conversation_key, latest_message_query, record_message, mark_conversation_read, get_user_unread_count
+)
+from utils.message_hub import message_hub
+from utils.pagination import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -46,34 +56,47 @@ class ConversationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+async def commit_read(db: AsyncSession, reader_id: int, participant_id: int, count: int):
+    """Commit a mark-read and tell the reader's open sockets, so their unread counts follow"""
+    event = {"type": "read", "participant_id": participant_id, "read_count": count}
+    if count:
+        await message_hub.notify(db, [reader_id], event)
+    await db.commit()
+    if count:
+        message_hub.publish([reader_id], event)
+
 @router.post("/send", response_model=MessageResponse)
-def send_message(
+async def send_message(
     message_data: MessageCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Verify recipient exists
-    recipient = db.query(User).filter(User.id == message_data.recipient_id).first()
+    recipient = await db.scalar(select(User).where(User.id == message_data.recipient_id))
     if not recipient:
         raise HTTPException(status_code=404, detail="Recipient not found")
     
     # Verify job exists if job_id provided
     job = None
     if message_data.job_id:
-        job = db.query(Job).filter(Job.id == message_data.job_id).first()
+        job = await db.scalar(select(Job).where(Job.id == message_data.job_id))
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
     
     # Verify application exists if application_id provided
     application = None
     if message_data.application_id:
-        application = db.query(Application).filter(Application.id == message_data.application_id).first()
+        application = await db.scalar(
+            select(Application)
+            .options(joinedload(Application.job))
+            .where(Application.id == message_data.application_id)
+        )
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         
         # Ensure user has access to this application
-        if (current_user.user_type == "candidate" and application.candidate_id != current_user.id) or \
-           (current_user.user_type == "employer" and application.job.employer_id != current_user.id):
+        if (current_user.user_type == UserType.CANDIDATE and application.candidate_id != current_user.id) or \
+           (current_user.user_type == UserType.EMPLOYER and application.job.employer_id != current_user.id):
             raise HTTPException(status_code=403, detail="Access denied")
     
     # Create message
@@ -87,16 +110,17 @@ def send_message(
     )
     
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    await db.flush()
+    await record_message(db, message)
+    await db.refresh(message)
     
     # Return message with sender/recipient names
-    return MessageResponse(
+    response = MessageResponse(
         id=message.id,
         sender_id=message.sender_id,
         recipient_id=message.recipient_id,
-        sender_name=current_user.full_name,
-        recipient_name=recipient.full_name,
+        sender_name=current_user.name,
+        recipient_name=recipient.name,
         subject=message.subject,
         content=message.content,
         is_read=message.is_read,
@@ -106,121 +130,203 @@ def send_message(
         created_at=message.created_at
     )
 
+    # Push to both sides' open sockets: here directly, in other workers once this commits
+    participants = [message.sender_id, message.recipient_id]
+    event = {"type": "message", "message": jsonable_encoder(response)}
+    await message_hub.notify(db, participants, event)
+    await db.commit()
+    message_hub.publish(participants, event)
+    
+    return response
+
 @router.get("/conversations", response_model=List[ConversationResponse])
-def get_conversations(
+async def get_conversations(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    # Get all conversations (grouped by participant)
+    # One indexed query over the conversations summary, newest first
+    is_low = Conversation.user_low_id == current_user.id
+    partner_id = case((is_low, Conversation.user_high_id), else_=Conversation.user_low_id)
+    unread_count = case((is_low, Conversation.unread_low), else_=Conversation.unread_high)
+
+    rows = (await db.execute(
+        select(Message, partner_id, User.name, unread_count, Job.title)
+        .select_from(Conversation)
+        .outerjoin(Message, Message.id == Conversation.last_message_id)
+        .join(User, User.id == partner_id)
+        .outerjoin(Job, Job.id == Message.job_id)
+        .where(
+            or_(Conversation.user_low_id == current_user.id, Conversation.user_high_id == current_user.id),
+            Conversation.user_low_id != Conversation.user_high_id
+        )
+        .order_by(desc(Conversation.last_message_at))
+    )).all()
+
     conversations = []
-    
-    # Get unique conversation partners
-    partners_query = db.query(
-        User.id,
-        User.full_name
-    ).join(
-        Message, 
-        or_(
-            and_(Message.sender_id == User.id, Message.recipient_id == current_user.id),
-            and_(Message.recipient_id == User.id, Message.sender_id == current_user.id)
+    for latest_message, participant_id, participant_name, unread, job_title in rows:
+        if latest_message is None:
+            # Summary lost its message to a delete it was not updated for; find the newest one left
+            latest_message = await db.scalar(
+                latest_message_query(*conversation_key(current_user.id, participant_id))
+                .options(joinedload(Message.job))
+            )
+            if latest_message is None:
+                continue
+            job_title = latest_message.job.title if latest_message.job else None
+
+        # The latest message is always between the current user and the partner
+        sent_by_me = latest_message.sender_id == current_user.id
+        conversations.append(ConversationResponse(
+            participant_id=participant_id,
+            participant_name=participant_name,
+            latest_message=MessageResponse(
+                id=latest_message.id,
+                sender_id=latest_message.sender_id,
+                recipient_id=latest_message.recipient_id,
+                sender_name=current_user.name if sent_by_me else participant_name,
+                recipient_name=participant_name if sent_by_me else current_user.name,
+                subject=latest_message.subject,
+                content=latest_message.content,
+                is_read=latest_message.is_read,
+                job_id=latest_message.job_id,
+                application_id=latest_message.application_id,
+                job_title=job_title,
+                created_at=latest_message.created_at
+            ),
+            unread_count=unread
+        ))
+
+    return conversations
+
+@router.get("/search", response_model=List[MessageResponse])
+async def search_messages(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
+):
+    """Search the caller's sent and received messages, best match first, then newest.
+
+    ``q`` accepts web search syntax ("quoted phrases", or, -excluded). Pass the
+    X-Next-Cursor header of one page as ``cursor`` to fetch the next.
+    """
+    # Matches ix_messages_search_vector
+    ts_query = func.websearch_to_tsquery(MESSAGE_SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(Message.search_vector, ts_query, type_=Float)
+    query = select(Message, rank).options(
+        joinedload(Message.sender),
+        joinedload(Message.recipient),
+        joinedload(Message.job)
+    ).where(
+        Message.search_vector.op("@@")(ts_query),
+        or_(Message.sender_id == current_user.id, Message.recipient_id == current_user.id)
+    ).order_by(desc(rank), desc(Message.created_at), desc(Message.id))
+    if cursor:
+        cursor_rank, cursor_created_at, cursor_id = decode_cursor(cursor, float, datetime, int)
+        query = query.where(
+            tuple_(rank, Message.created_at, Message.id) < tuple_(cursor_rank, cursor_created_at, cursor_id)
         )
-    ).filter(
-        User.id != current_user.id
-    ).distinct()
     
-    for partner_id, partner_name in partners_query:
-        # Get latest message in conversation
-        latest_message = db.query(Message).join(User, Message.sender_id == User.id).filter(
-            or_(
-                and_(Message.sender_id == current_user.id, Message.recipient_id == partner_id),
-                and_(Message.sender_id == partner_id, Message.recipient_id == current_user.id)
-            )
-        ).order_by(desc(Message.created_at)).first()
-        
-        if latest_message:
-            # Count unread messages from this partner
-            unread_count = db.query(Message).filter(
-                and_(
-                    Message.sender_id == partner_id,
-                    Message.recipient_id == current_user.id,
-                    Message.is_read == False
-                )
-            ).count()
-            
-            # Get job title if applicable
-            job_title = None
-            if latest_message.job_id:
-                job = db.query(Job).filter(Job.id == latest_message.job_id).first()
-                job_title = job.title if job else None
-            
-            conversations.append(ConversationResponse(
-                participant_id=partner_id,
-                participant_name=partner_name,
-                latest_message=MessageResponse(
-                    id=latest_message.id,
-                    sender_id=latest_message.sender_id,
-                    recipient_id=latest_message.recipient_id,
-                    sender_name=latest_message.sender.full_name,
-                    recipient_name=latest_message.recipient.full_name,
-                    subject=latest_message.subject,
-                    content=latest_message.content,
-                    is_read=latest_message.is_read,
-                    job_id=latest_message.job_id,
-                    application_id=latest_message.application_id,
-                    job_title=job_title,
-                    created_at=latest_message.created_at
-                ),
-                unread_count=unread_count
-            ))
+    rows = (await db.execute(query.limit(limit))).all()
+    if len(rows) == limit:
+        last, last_rank = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last_rank, last.created_at, last.id)
     
-    # Sort by latest message timestamp
-    conversations.sort(key=lambda x: x.latest_message.created_at, reverse=True)
-    return conversations
+    return [
+        MessageResponse(
+            id=message.id,
+            sender_id=message.sender_id,
+            recipient_id=message.recipient_id,
+            sender_name=message.sender.name,
+            recipient_name=message.recipient.name,
+            subject=message.subject,
+            content=message.content,
+            is_read=message.is_read,
+            job_id=message.job_id,
+            application_id=message.application_id,
+            job_title=message.job.title if message.job else None,
+            created_at=message.created_at
+        )
+        for message, _ in rows
+    ]
 
 @router.get("/conversation/{participant_id}", response_model=List[MessageResponse])
-def get_conversation_messages(
+async def get_conversation_messages(
     participant_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    limit: int = Query(50, ge=1, le=100)
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=100),
+    before_id: Optional[int] = Query(None, description="Page of messages older than this one"),
+    after_id: Optional[int] = Query(None, description="Page of messages newer than this one")
 ):
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=400, detail="Pass either before_id or after_id, not both")
+
     # Verify participant exists
-    participant = db.query(User).filter(User.id == participant_id).first()
+    participant = await db.scalar(select(User).where(User.id == participant_id))
     if not participant:
         raise HTTPException(status_code=404, detail="Participant not found")
     
-    # Get messages in conversation
-    messages = db.query(Message).filter(
-        or_(
-            and_(Message.sender_id == current_user.id, Message.recipient_id == participant_id),
-            and_(Message.sender_id == participant_id, Message.recipient_id == current_user.id)
-        )
-    ).order_by(desc(Message.created_at)).limit(limit).all()
+    # Match the pair the way ix_messages_pair_created_at_id indexes it
+    user_low_id, user_high_id = conversation_key(current_user.id, participant_id)
+    query = select(Message).options(
+        joinedload(Message.sender),
+        joinedload(Message.recipient),
+        joinedload(Message.job)
+    ).where(
+        func.least(Message.sender_id, Message.recipient_id) == user_low_id,
+        func.greatest(Message.sender_id, Message.recipient_id) == user_high_id
+    )
+
+    # Page relative to a message of this conversation, keyed on (created_at, id)
+    cursor_id = before_id if before_id is not None else after_id
+    if cursor_id is not None:
+        cursor = (await db.execute(select(Message.created_at, Message.sender_id, Message.recipient_id).where(
+            Message.id == cursor_id
+        ))).first()
+        if cursor is None or conversation_key(cursor.sender_id, cursor.recipient_id) != (user_low_id, user_high_id):
+            raise HTTPException(status_code=404, detail="Message not found")
+        position = tuple_(Message.created_at, Message.id)
+        if before_id is not None:
+            query = query.where(position < tuple_(cursor.created_at, cursor_id))
+        else:
+            query = query.where(position > tuple_(cursor.created_at, cursor_id))
+
+    if after_id is not None:
+        result = await db.execute(query.order_by(Message.created_at, Message.id).limit(limit))
+        messages = list(reversed(result.scalars().all()))
+    else:
+        result = await db.execute(query.order_by(desc(Message.created_at), desc(Message.id)).limit(limit))
+        messages = result.scalars().all()
     
-    # Mark messages from participant as read
-    db.query(Message).filter(
-        and_(
-            Message.sender_id == participant_id,
-            Message.recipient_id == current_user.id,
-            Message.is_read == False
-        )
-    ).update({Message.is_read: True})
-    db.commit()
+    # Mark messages from participant as read, only when some are unread
+    unread = await db.scalar(select(
+        Conversation.unread_low if current_user.id == user_low_id else Conversation.unread_high
+    ).where(Conversation.user_low_id == user_low_id, Conversation.user_high_id == user_high_id))
+    if unread or any(message.recipient_id == current_user.id and not message.is_read for message in messages):
+        marked = await db.execute(update(Message).where(
+            and_(
+                Message.sender_id == participant_id,
+                Message.recipient_id == current_user.id,
+                Message.is_read == False
+            )
+        ).values(is_read=True))
+        await mark_conversation_read(db, current_user.id, participant_id, marked.rowcount)
+        await commit_read(db, current_user.id, participant_id, marked.rowcount)
     
     # Convert to response format
     response_messages = []
     for message in messages:
-        job_title = None
-        if message.job_id:
-            job = db.query(Job).filter(Job.id == message.job_id).first()
-            job_title = job.title if job else None
+        job_title = message.job.title if message.job else None
         
         response_messages.append(MessageResponse(
             id=message.id,
             sender_id=message.sender_id,
             recipient_id=message.recipient_id,
-            sender_name=message.sender.full_name,
-            recipient_name=message.recipient.full_name,
+            sender_name=message.sender.name,
+            recipient_name=message.recipient.name,
             subject=message.subject,
             content=message.content,
             is_read=message.is_read,
@@ -233,33 +339,84 @@ def get_conversation_messages(
     return list(reversed(response_messages))  # Return in chronological order
 
 @router.get("/unread-count")
-def get_unread_count(
+async def get_unread_count(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    count = db.query(Message).filter(
-        and_(
-            Message.recipient_id == current_user.id,
-            Message.is_read == False
-        )
-    ).count()
+    # Maintained counter behind a cache invalidated by message and read events
+    count = await get_user_unread_count(db, current_user.id)
     
     return {"unread_count": count}
 
 @router.put("/{message_id}/read")
-def mark_message_read(
+async def mark_message_read(
     message_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    message = db.query(Message).filter(Message.id == message_id).first()
+    message = await db.scalar(select(Message).where(Message.id == message_id))
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     
     if message.recipient_id != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    message.is_read = True
-    db.commit()
+    # Conditional, so concurrent mark-reads take a message off the counters once
+    marked = await db.execute(update(Message).where(
+        and_(
+            Message.id == message_id,
+            Message.is_read == False
+        )
+    ).values(is_read=True))
+    newly_read = marked.rowcount
+    await mark_conversation_read(db, current_user.id, message.sender_id, newly_read)
+    await commit_read(db, current_user.id, message.sender_id, newly_read)
     
-    return {"message": "Message marked as read"}
\ No newline at end of file
+    return {"message": "Message marked as read"}
+
+@router.websocket("/ws")
+async def message_socket(websocket: WebSocket, token: str = Query(...)):
+    """Push new messages and read updates to the user instead of polling.
+
+    Browsers cannot set headers on a WebSocket, so the access token is passed as ``?token=``.
+    """
+    payload = verify_token(token, "access")
+    if payload is None or payload.get("sub") is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # Short-lived session: the socket may stay open for hours
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.id == int(payload["sub"])))
+        if user is None or not user.is_active:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        await websocket.accept()
+        # Subscribe before reading the count so no message falls between the two
+        subscription = message_hub.subscribe(user.id)
+        try:
+            unread_count = await get_user_unread_count(db, user.id)
+        except Exception:
+            message_hub.unsubscribe(subscription)
+            raise
+
+    async def forward_events():
+        await websocket.send_json({"type": "unread_count", "unread_count": unread_count})
+        while True:
+            event = await subscription.get()
+            if event is None:
+                # Fell too far behind; the client reconnects and resyncs
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return
+            await websocket.send_json(event)
+
+    forwarder = asyncio.create_task(forward_events())
+    try:
+        # Client frames are ignored; reading them is how a disconnect is noticed
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        forwarder.cancel()
+        message_hub.unsubscribe(subscription)
+        await asyncio.gather(forwarder, return_exceptions=True)
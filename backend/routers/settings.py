@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.system_settings import SystemSettings
 from models.user import User
@@ -12,34 +13,36 @@ router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 @router.get("", response_model=List[SystemSettingsResponse])
 async def get_system_settings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_admin),
     category: Optional[str] = None
 ):
     """Get system settings"""
-    query = db.query(SystemSettings)
+    query = select(SystemSettings)
     
     if category:
-        query = query.filter(SystemSettings.category == category)
+        query = query.where(SystemSettings.category == category)
     
-    settings = query.order_by(SystemSettings.category, SystemSettings.key).all()
+    result = await db.execute(query.order_by(SystemSettings.category, SystemSettings.key))
+    settings = result.scalars().all()
     return settings
 
 @router.get("/public")
-async def get_public_settings(db: Session = Depends(get_db)):
+async def get_public_settings(db: AsyncSession = Depends(get_db)):
     """Get public system settings (no auth required)"""
-    settings = db.query(SystemSettings).filter(SystemSettings.is_public == True).all()
+    result = await db.execute(select(SystemSettings).where(SystemSettings.is_public == True))
+    settings = result.scalars().all()
     return {setting.key: setting.value for setting in settings}
 
 @router.post("", response_model=SystemSettingsResponse)
 async def create_setting(
     setting_data: SystemSettingsCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_super_admin)
 ):
     """Create a new system setting (super admin only)"""
     # Check if setting key already exists
-    existing = db.query(SystemSettings).filter(SystemSettings.key == setting_data.key).first()
+    existing = await db.scalar(select(SystemSettings).where(SystemSettings.key == setting_data.key))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,8 +51,8 @@ async def create_setting(
     
     setting = SystemSettings(**setting_data.dict())
     db.add(setting)
-    db.commit()
-    db.refresh(setting)
+    await db.commit()
+    await db.refresh(setting)
     
     return setting
 
@@ -57,11 +60,11 @@ async def create_setting(
 async def update_setting(
     setting_key: str,
     setting_data: SystemSettingsUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_super_admin)
 ):
     """Update a system setting (super admin only)"""
-    setting = db.query(SystemSettings).filter(SystemSettings.key == setting_key).first()
+    setting = await db.scalar(select(SystemSettings).where(SystemSettings.key == setting_key))
     if not setting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -72,41 +75,41 @@ async def update_setting(
     for field, value in update_data.items():
         setattr(setting, field, value)
     
-    db.commit()
-    db.refresh(setting)
+    await db.commit()
+    await db.refresh(setting)
     
     return setting
 
 @router.delete("/{setting_key}")
 async def delete_setting(
     setting_key: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_super_admin)
 ):
     """Delete a system setting (super admin only)"""
-    setting = db.query(SystemSettings).filter(SystemSettings.key == setting_key).first()
+    setting = await db.scalar(select(SystemSettings).where(SystemSettings.key == setting_key))
     if not setting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Setting not found"
         )
     
-    db.delete(setting)
-    db.commit()
+    await db.delete(setting)
+    await db.commit()
     
     return {"message": f"Setting '{setting_key}' deleted successfully"}
 
 @router.post("/bulk")
 async def bulk_update_settings(
     settings: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_super_admin)
 ):
     """Bulk update multiple settings"""
     updated_settings = []
     
     for key, value in settings.items():
-        setting = db.query(SystemSettings).filter(SystemSettings.key == key).first()
+        setting = await db.scalar(select(SystemSettings).where(SystemSettings.key == key))
         if setting:
             setting.value = str(value) if value is not None else None
             updated_settings.append(setting)
@@ -120,14 +123,14 @@ async def bulk_update_settings(
             db.add(new_setting)
             updated_settings.append(new_setting)
     
-    db.commit()
+    await db.commit()
     
     return {"message": f"Updated {len(updated_settings)} settings", "updated_keys": list(settings.keys())}
 
 # Initialize default settings
 @router.post("/initialize")
 async def initialize_default_settings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_super_admin)
 ):
     """Initialize default system settings"""
@@ -157,12 +160,12 @@ async def initialize_default_settings(
     
     created_count = 0
     for setting_data in default_settings:
-        existing = db.query(SystemSettings).filter(SystemSettings.key == setting_data["key"]).first()
+        existing = await db.scalar(select(SystemSettings).where(SystemSettings.key == setting_data["key"]))
         if not existing:
             setting = SystemSettings(**setting_data)
             db.add(setting)
             created_count += 1
     
-    db.commit()
+    await db.commit()
     
     return {"message": f"Initialized {created_count} default settings"}
\ No newline at end of file
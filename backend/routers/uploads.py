@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
 from models.user import User, UserType
 from auth.dependencies import get_current_active_user
@@ -23,7 +23,7 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 async def upload_resume(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload a resume for the current candidate user"""
     
@@ -73,7 +73,7 @@ async def upload_resume(
         current_user.resume_uploaded_at = upload_result['uploaded_at']
         current_user.resume_file_size = upload_result['file_size']
         
-        db.commit()
+        await db.commit()
         
         logger.info(f"Resume uploaded successfully for user {current_user.id}: {file.filename}")
         
@@ -96,7 +96,7 @@ async def upload_resume(
 @router.delete("/resume")
 async def delete_resume(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete the current user's resume"""
     
@@ -121,7 +121,7 @@ async def delete_resume(
         current_user.resume_file_name = None
         current_user.resume_uploaded_at = None
         current_user.resume_file_size = None
-        db.commit()
+        await db.commit()
         
         logger.info(f"Resume removed from user profile {current_user.id} (S3 file preserved: {s3_key})")
         return {"message": "Resume deleted successfully"}
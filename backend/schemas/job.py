@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 # Enums for frontend
@@ -22,6 +22,22 @@ class LocationTypeEnum(str, Enum):
     ON_SITE = "on_site"
     HYBRID = "hybrid"
 
+class JobImportFormatEnum(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class ExportFormatEnum(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class JobSortEnum(str, Enum):
+    NEWEST = "newest"
+    RELEVANCE = "relevance"
+
+class ApplicantSortEnum(str, Enum):
+    NEWEST = "newest"
+    MATCH = "match"
+
 class ApplicationStatusEnum(str, Enum):
     PENDING = "pending"
     REVIEWED = "reviewed"
@@ -39,17 +55,17 @@ class JobBase(BaseModel):
     description: str = Field(..., min_length=10)
     requirements: Optional[str] = None
     responsibilities: Optional[str] = None
-    location: Optional[str] = None
+    location: Optional[str] = Field(None, max_length=200)
     location_type: LocationTypeEnum = LocationTypeEnum.ON_SITE
     employment_type: EmploymentTypeEnum = EmploymentTypeEnum.FULL_TIME
     salary_min: Optional[float] = Field(None, ge=0)
     salary_max: Optional[float] = Field(None, ge=0)
-    salary_currency: str = "USD"
+    salary_currency: str = Field("USD", max_length=3)
     required_skills: Optional[str] = None  # JSON string
-    experience_level: Optional[str] = None
+    experience_level: Optional[str] = Field(None, max_length=50)
     application_deadline: Optional[datetime] = None
-    application_email: Optional[str] = None
-    application_url: Optional[str] = None
+    application_email: Optional[str] = Field(None, max_length=255)
+    application_url: Optional[str] = Field(None, max_length=500)
 
 class JobCreate(JobBase):
     pass
@@ -59,17 +75,17 @@ class JobUpdate(BaseModel):
     description: Optional[str] = Field(None, min_length=10)
     requirements: Optional[str] = None
     responsibilities: Optional[str] = None
-    location: Optional[str] = None
+    location: Optional[str] = Field(None, max_length=200)
     location_type: Optional[LocationTypeEnum] = None
     employment_type: Optional[EmploymentTypeEnum] = None
     salary_min: Optional[float] = Field(None, ge=0)
     salary_max: Optional[float] = Field(None, ge=0)
-    salary_currency: Optional[str] = None
+    salary_currency: Optional[str] = Field(None, max_length=3)
     required_skills: Optional[str] = None
-    experience_level: Optional[str] = None
+    experience_level: Optional[str] = Field(None, max_length=50)
     application_deadline: Optional[datetime] = None
-    application_email: Optional[str] = None
-    application_url: Optional[str] = None
+    application_email: Optional[str] = Field(None, max_length=255)
+    application_url: Optional[str] = Field(None, max_length=500)
     status: Optional[JobStatusEnum] = None
 
 class JobResponse(JobBase):
@@ -79,6 +95,7 @@ class JobResponse(JobBase):
     status: JobStatusEnum
     is_featured: bool
     views_count: int
+    unique_views: Optional[int] = None  # Approximate distinct viewers
     applications_count: int
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -100,11 +117,34 @@ class JobListItem(BaseModel):
     status: JobStatusEnum
     created_at: datetime
     views_count: int
+    unique_views: Optional[int] = None  # Employer listings only
+    match_score: Optional[float] = None  # Recommendations only, 0-1
     applications_count: int
     
     class Config:
         from_attributes = True
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class JobFacetsResponse(BaseModel):
+    total: int
+    employment_type: List[FacetCount]
+    location_type: List[FacetCount]
+    experience_level: List[FacetCount]
+    salary_band: List[FacetCount]
+
+class JobImportError(BaseModel):
+    row: int  # Line number in the uploaded file
+    errors: List[str]
+
+class JobBulkImportResponse(BaseModel):
+    created: int
+    failed: int
+    job_ids: List[int]
+    errors: List[JobImportError]
+
 # Application schemas
 class ApplicationBase(BaseModel):
     cover_letter: Optional[str] = None
@@ -137,4 +177,30 @@ class ApplicationResponse(ApplicationBase):
     candidate_email: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PipelineStage(BaseModel):
+    status: ApplicationStatusEnum
+    total: int
+    applications: List[ApplicationResponse]
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` to load more of this stage
+
+class ApplicationPipelineResponse(BaseModel):
+    stages: List[PipelineStage]
+
+class FunnelStage(BaseModel):
+    status: ApplicationStatusEnum
+    entered: int
+    exited: int
+    median_seconds_in_stage: Optional[float] = None  # Approximate; None until something left the stage
+
+class FunnelTransition(BaseModel):
+    from_status: Optional[ApplicationStatusEnum] = None  # None for new applications
+    to_status: ApplicationStatusEnum
+    count: int
+
+class ApplicationFunnelResponse(BaseModel):
+    since: date
+    job_id: Optional[int] = None
+    stages: List[FunnelStage]
+    transitions: List[FunnelTransition]
@@ -0,0 +1,153 @@
+from collections import defaultdict
+from typing import Optional, Sequence
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.application import Application
+from models.job import Job
+from models.skill import JobSkill, CandidateSkill
+from models.user import User
+from utils.recommendations import NEUTRAL_SCORE, experience_code
+
+# Relative weight of each term in an applicant's match score
+SKILL_WEIGHT = 0.6
+EXPERIENCE_WEIGHT = 0.25
+SALARY_WEIGHT = 0.15
+
+# Years of experience that fully satisfy each of recommendations.EXPERIENCE_LEVELS
+LEVEL_YEARS = (0, 2, 5, 10)
+
+# Job and candidate fields the score depends on; changing any of them clears cached scores
+JOB_MATCH_FIELDS = ("required_skills", "experience_level", "salary_min", "salary_max")
+CANDIDATE_MATCH_FIELDS = ("skills", "technical_skills", "years_of_experience", "expected_salary")
+
+def score_applicants(
+    job_skill_ids: Sequence[int],
+    job_salary: Optional[float],
+    job_experience_level: Optional[str],
+    entry_rows: np.ndarray,
+    entry_skills: np.ndarray,
+    years: np.ndarray,
+    expected_salary: np.ndarray
+) -> np.ndarray:
+    """Match score in [0, 1] of every applicant to one job.
+
+    Applicant skills are a sparse (row, skill_id) coordinate list;
+    ``years`` and ``expected_salary`` hold one value per row, NaN when unset.
+    """
+    size = len(years)
+
+    # Cosine similarity between the binary skill vectors of job and applicant
+    if len(job_skill_ids):
+        skill_counts = np.bincount(entry_rows, minlength=size)
+        hits = np.isin(entry_skills, np.asarray(job_skill_ids, dtype=np.int64))
+        overlap = np.bincount(entry_rows[hits], minlength=size)
+        skill_score = overlap / np.sqrt(np.maximum(skill_counts, 1) * len(job_skill_ids))
+    else:
+        skill_score = np.full(size, NEUTRAL_SCORE)
+
+    # Full marks at the level's years of experience, fading linearly below that
+    level = experience_code(job_experience_level)
+    if level > 0:
+        experience_score = np.clip(years / LEVEL_YEARS[level], 0.0, 1.0)
+        experience_score[np.isnan(years)] = NEUTRAL_SCORE
+    else:
+        experience_score = np.where(np.isnan(years) | (level < 0), NEUTRAL_SCORE, 1.0)
+
+    # Full marks when the job pays what the applicant expects
+    if job_salary:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            salary_score = np.clip(float(job_salary) / expected_salary, 0.0, 1.0)
+        salary_score[np.isnan(expected_salary) | (expected_salary <= 0)] = NEUTRAL_SCORE
+    else:
+        salary_score = np.full(size, NEUTRAL_SCORE)
+
+    return SKILL_WEIGHT * skill_score + EXPERIENCE_WEIGHT * experience_score + SALARY_WEIGHT * salary_score
+
+async def ensure_match_scores(db: AsyncSession, *criteria) -> int:
+    """Score applications matching ``criteria`` that have no cached score; returns how many.
+
+    Scores are written in the caller's transaction, which must commit for them to stick.
+    """
+    missing = (
+        select(Application.id, Application.job_id, Application.candidate_id)
+        .join(Job, Job.id == Application.job_id)
+        .where(Application.match_score.is_(None), *criteria)
+    )
+    applications = (await db.execute(missing)).all()
+    if not applications:
+        return 0
+
+    # Each candidate's profile is loaded once, however many of the jobs they applied to
+    missing_candidates = missing.with_only_columns(Application.candidate_id)
+    candidates = (await db.execute(
+        select(User.id, User.years_of_experience, User.expected_salary).where(User.id.in_(missing_candidates))
+    )).all()
+    positions = {candidate_id: position for position, (candidate_id, _, _) in enumerate(candidates)}
+    years = np.array([np.nan if value is None else value for _, value, _ in candidates], dtype=np.float64)
+    expected_salary = np.array([np.nan if value is None else value for _, _, value in candidates], dtype=np.float64)
+
+    skills = (await db.execute(
+        select(CandidateSkill.candidate_id, CandidateSkill.skill_id)
+        .where(CandidateSkill.candidate_id.in_(missing_candidates))
+    )).all()
+    entry_candidates = np.array([positions[candidate_id] for candidate_id, _ in skills], dtype=np.int64)
+    entry_skills = np.array([skill_id for _, skill_id in skills], dtype=np.int64)
+
+    job_ids = sorted({job_id for _, job_id, _ in applications})
+    jobs = (await db.execute(
+        select(Job.id, Job.salary_min, Job.salary_max, Job.experience_level).where(Job.id.in_(job_ids))
+    )).all()
+    job_skills = defaultdict(list)
+    for job_id, skill_id in (await db.execute(
+        select(JobSkill.job_id, JobSkill.skill_id).where(JobSkill.job_id.in_(job_ids))
+    )).all():
+        job_skills[job_id].append(skill_id)
+
+    by_job = defaultdict(list)
+    for application_id, job_id, candidate_id in applications:
+        by_job[job_id].append((application_id, positions[candidate_id]))
+
+    rows = []
+    for job_id, salary_min, salary_max, experience_level in jobs:
+        application_ids, applicants = zip(*by_job[job_id])
+        applicants = np.array(applicants, dtype=np.int64)
+
+        # Re-index this job's applicants to 0..n-1 and keep only their skill entries
+        local = np.full(len(candidates), -1, dtype=np.int64)
+        local[applicants] = np.arange(len(applicants))
+        entry_rows = local[entry_candidates]
+        kept = entry_rows >= 0
+
+        scores = score_applicants(
+            job_skills[job_id],
+            salary_max if salary_max is not None else salary_min,
+            experience_level,
+            entry_rows[kept],
+            entry_skills[kept],
+            years[applicants],
+            expected_salary[applicants]
+        )
+        rows.extend(
+            {"application_id": application_id, "score": round(float(score), 4)}
+            for application_id, score in zip(application_ids, scores)
+        )
+
+    # Caching a score is not an edit of the application, so keep updated_at untouched
+    applications_table = Application.__table__
+    await db.execute(
+        update(applications_table)
+        .where(applications_table.c.id == bindparam("application_id"))
+        .values(match_score=bindparam("score"), updated_at=applications_table.c.updated_at),
+        rows
+    )
+    return len(rows)
+
+async def invalidate_match_scores(db: AsyncSession, *criteria) -> None:
+    """Clear cached scores of the applications matching ``criteria``, e.g. one job's or one candidate's"""
+    await db.execute(
+        update(Application)
+        .where(Application.match_score.is_not(None), *criteria)
+        .values(match_score=None, updated_at=Application.updated_at)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import random
+from collections import Counter
+from typing import Dict, Sequence
+from decouple import config
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from database import AsyncSessionLocal
+from models.application import Application, ApplicationStatus
+from models.employer_application_count import EmployerApplicationCount
+from models.job import Job
+from models.job_application_count import JobApplicationCountShard
+
+logger = logging.getLogger(__name__)
+
+# Writers pick a random shard row, so N concurrent writers rarely wait on each other's locks
+COUNTER_SHARDS = config('APPLICATION_COUNTER_SHARDS', default=8, cast=int)
+
+async def count_applications_by_status(db: AsyncSession, *criteria) -> Counter:
+    """Count applications per status in one grouped query, e.g. for one job or employer"""
+    result = await db.execute(
+        select(Application.status, func.count())
+        .join(Job, Job.id == Application.job_id)
+        .where(*criteria)
+        .group_by(Application.status)
+    )
+    return Counter(dict(result.all()))
+
+async def adjust_status_counts(db: AsyncSession, employer_id: int, deltas: Dict[ApplicationStatus, int]) -> None:
+    """Apply per-status deltas to an employer's counters in the caller's transaction"""
+    # Fixed status order keeps concurrent writers locking counter rows in the same sequence
+    shard = random.randrange(COUNTER_SHARDS)
+    rows = [
+        {"employer_id": employer_id, "status": application_status, "shard": shard, "count": delta}
+        for application_status, delta in sorted(deltas.items(), key=lambda item: item[0].name)
+        if delta
+    ]
+    if not rows:
+        return
+
+    statement = insert(EmployerApplicationCount).values(rows)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[
+            EmployerApplicationCount.employer_id, EmployerApplicationCount.status, EmployerApplicationCount.shard
+        ],
+        set_={"count": EmployerApplicationCount.count + statement.excluded.count}
+    ))
+
+async def get_status_counts(db: AsyncSession, employer_id: int) -> Counter:
+    """Read an employer's counters: at most one row per status and shard"""
+    result = await db.execute(
+        select(EmployerApplicationCount.status, func.sum(EmployerApplicationCount.count))
+        .where(EmployerApplicationCount.employer_id == employer_id)
+        .group_by(EmployerApplicationCount.status)
+    )
+    return Counter({application_status: int(count) for application_status, count in result.all()})
+
+async def increment_application_count(db: AsyncSession, job_id: int) -> None:
+    """Count a new application against a random shard of the job's counter"""
+    statement = insert(JobApplicationCountShard).values(
+        job_id=job_id, shard=random.randrange(COUNTER_SHARDS), count=1
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[JobApplicationCountShard.job_id, JobApplicationCountShard.shard],
+        set_={"count": JobApplicationCountShard.count + 1}
+    ))
+
+async def load_application_counts(db: AsyncSession, jobs: Sequence[Job]) -> None:
+    """Add each job's not-yet-compacted shard totals to its applications_count"""
+    if not jobs:
+        return
+
+    result = await db.execute(
+        select(JobApplicationCountShard.job_id, func.sum(JobApplicationCountShard.count))
+        .where(JobApplicationCountShard.job_id.in_([job.id for job in jobs]))
+        .group_by(JobApplicationCountShard.job_id)
+    )
+    pending = dict(result.all())
+    for job in jobs:
+        if job.id in pending:
+            # Display-only adjustment; must not be flushed back into the column
+            set_committed_value(job, "applications_count", (job.applications_count or 0) + int(pending[job.id]))
+
+class ApplicationCountCompactor:
+    """Periodically folds job counter shards into jobs.applications_count.
+
+    Between runs the shards are summed on read by ``load_application_counts``;
+    compaction keeps the shard table small and the column itself usable for
+    sorting and admin reports.
+    """
+
+    def __init__(self, interval: float = 60.0):
+        self.interval = interval
+        self._task = None
+
+    async def compact(self) -> int:
+        """Move all shard totals into jobs in one statement; returns jobs touched"""
+        moved = delete(JobApplicationCountShard).returning(
+            JobApplicationCountShard.job_id, JobApplicationCountShard.count
+        ).cte("moved")
+        totals = (
+            select(moved.c.job_id, func.sum(moved.c.count).label("total"))
+            .group_by(moved.c.job_id)
+            .subquery()
+        )
+        statement = (
+            update(Job)
+            .where(Job.id == totals.c.job_id)
+            # Counter maintenance is not a content edit, so keep updated_at untouched
+            .values(applications_count=Job.applications_count + totals.c.total, updated_at=Job.updated_at)
+            .add_cte(moved)
+            .returning(Job.id)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            async with AsyncSessionLocal() as db:
+                compacted = len((await db.execute(statement)).all())
+                await db.commit()
+            return compacted
+        except Exception as e:
+            logger.error(f"Failed to compact application counters: {e}")
+            return 0
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.compact()
+
+    def start(self) -> None:
+        """Start the periodic compaction task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the compaction task and run one final pass"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.compact()
+
+application_count_compactor = ApplicationCountCompactor(
+    interval=config('APPLICATION_COUNT_COMPACT_INTERVAL', default=60.0, cast=float),
+)
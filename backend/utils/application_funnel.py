@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional, Sequence
+from decouple import config
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from models.application import ApplicationStatus
+from models.application_status_event import ApplicationStatusEvent, ApplicationTransitionDaily
+
+logger = logging.getLogger(__name__)
+
+class StatusChange(NamedTuple):
+    application_id: int
+    job_id: int
+    from_status: Optional[ApplicationStatus]  # None when the application is created
+    to_status: ApplicationStatus
+    applied_at: Optional[datetime] = None  # Application.created_at, for history older than the events
+
+def duration_bucket(seconds: Optional[int]) -> Optional[int]:
+    """Log2 bucket of a stay in minutes: 0 for under 2 minutes, 1 for 2-4, 2 for 4-8, ..."""
+    if seconds is None:
+        return None
+    return (max(seconds, 60) // 60).bit_length() - 1
+
+def median_seconds(bucket_counts: Dict[int, int]) -> Optional[float]:
+    """Approximate median stay from bucket counts, as the geometric middle of the median bucket"""
+    total = sum(bucket_counts.values())
+    if not total:
+        return None
+    seen = 0
+    for bucket in sorted(bucket_counts):
+        seen += bucket_counts[bucket]
+        if seen * 2 >= total:
+            return 60 * 2 ** (bucket + 0.5)
+
+async def record_status_changes(db: AsyncSession, employer_id: int, changes: Sequence[StatusChange]) -> None:
+    """Append one status event per change in the caller's transaction"""
+    changes = [change for change in changes if change.from_status != change.to_status]
+    if not changes:
+        return
+
+    # A stage was entered at the application's latest event, or on applying for pre-history rows
+    entered_at = {}
+    moved_ids = [change.application_id for change in changes if change.from_status is not None]
+    if moved_ids:
+        result = await db.execute(
+            select(ApplicationStatusEvent.application_id, func.max(ApplicationStatusEvent.created_at))
+            .where(ApplicationStatusEvent.application_id.in_(moved_ids))
+            .group_by(ApplicationStatusEvent.application_id)
+        )
+        entered_at = dict(result.all())
+        # now() is the transaction start, the same clock the new events' created_at uses
+        now = await db.scalar(select(func.now()))
+
+    rows = []
+    for change in changes:
+        seconds_in_stage = None
+        if change.from_status is not None:
+            entered = entered_at.get(change.application_id)
+            if entered is None and change.from_status == ApplicationStatus.PENDING:
+                entered = change.applied_at
+            if entered is not None:
+                seconds_in_stage = max(int((now - entered).total_seconds()), 0)
+        rows.append({
+            "application_id": change.application_id,
+            "job_id": change.job_id,
+            "employer_id": employer_id,
+            "from_status": change.from_status,
+            "to_status": change.to_status,
+            "seconds_in_stage": seconds_in_stage,
+        })
+    await db.execute(insert(ApplicationStatusEvent), rows)
+
+class ApplicationFunnelRollup:
+    """Periodically folds new status events into application_transition_daily.
+
+    Each pass claims unprocessed events with SKIP LOCKED, so concurrent
+    passes (e.g. one per worker process) split the backlog instead of
+    counting an event twice. The funnel endpoint only ever reads the rollup.
+    """
+
+    def __init__(self, interval: float = 300.0, batch_size: int = 10000):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task = None
+
+    async def roll_up(self) -> int:
+        """Roll up every pending event; returns the number of events processed"""
+        processed = 0
+        try:
+            while True:
+                batch = await self._roll_up_batch()
+                processed += batch
+                if batch < self.batch_size:
+                    return processed
+        except Exception as e:
+            logger.error(f"Failed to roll up application status events: {e}")
+            return processed
+
+    async def _roll_up_batch(self) -> int:
+        claimed = (
+            select(ApplicationStatusEvent.id)
+            .where(ApplicationStatusEvent.rolled_up == False)
+            .order_by(ApplicationStatusEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(ApplicationStatusEvent)
+                .where(ApplicationStatusEvent.id.in_(claimed))
+                .values(rolled_up=True)
+                .returning(
+                    ApplicationStatusEvent.created_at, ApplicationStatusEvent.job_id,
+                    ApplicationStatusEvent.employer_id, ApplicationStatusEvent.from_status,
+                    ApplicationStatusEvent.to_status, ApplicationStatusEvent.seconds_in_stage
+                )
+                .execution_options(synchronize_session=False)
+            )
+            events = result.all()
+
+            counts = Counter(
+                (
+                    created_at.astimezone(timezone.utc).date(), job_id, employer_id,
+                    from_status, to_status, duration_bucket(seconds_in_stage)
+                )
+                for created_at, job_id, employer_id, from_status, to_status, seconds_in_stage in events
+            )
+            if counts:
+                rows = [
+                    {
+                        "day": day, "job_id": job_id, "employer_id": employer_id, "from_status": from_status,
+                        "to_status": to_status, "duration_bucket": bucket, "count": count
+                    }
+                    for (day, job_id, employer_id, from_status, to_status, bucket), count in counts.items()
+                ]
+                # A fixed order keeps concurrent passes locking rollup rows in the same sequence
+                rows.sort(key=lambda row: (
+                    row["day"], row["job_id"], str(row["from_status"]), str(row["to_status"]), str(row["duration_bucket"])
+                ))
+                statement = insert(ApplicationTransitionDaily)
+                await db.execute(statement.on_conflict_do_update(
+                    index_elements=[
+                        ApplicationTransitionDaily.day, ApplicationTransitionDaily.job_id,
+                        ApplicationTransitionDaily.from_status, ApplicationTransitionDaily.to_status,
+                        ApplicationTransitionDaily.duration_bucket
+                    ],
+                    set_={"count": ApplicationTransitionDaily.count + statement.excluded.count}
+                ), rows)
+            await db.commit()
+        return len(events)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.roll_up()
+
+    def start(self) -> None:
+        """Start the periodic rollup task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the rollup task and run one final pass"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.roll_up()
+
+application_funnel_rollup = ApplicationFunnelRollup(
+    interval=config('APPLICATION_FUNNEL_ROLLUP_INTERVAL', default=300.0, cast=float),
+)
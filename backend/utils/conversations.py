@@ -0,0 +1,161 @@
+from collections import Counter, defaultdict
+from typing import Iterable, Set, Tuple
+from decouple import config
+from sqlalchemy import case, delete, desc, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.conversation import Conversation
+from models.message import Message
+from models.user_message_count import UserMessageCount
+from utils.cache import TTLCache
+from utils.message_hub import message_hub
+
+# Unread totals per user id; the in-transaction counters are the source of truth
+unread_count_cache = TTLCache(
+    maxsize=config('UNREAD_COUNT_CACHE_SIZE', default=10000, cast=int),
+    ttl=config('UNREAD_COUNT_CACHE_TTL', default=30.0, cast=float)
+)
+
+# Bumped on every invalidation so a read that raced a change does not cache the old total
+_unread_count_generation: Counter = Counter()
+
+def conversation_key(user_id: int, other_user_id: int) -> Tuple[int, int]:
+    """(user_low_id, user_high_id) of the conversation between two users"""
+    return min(user_id, other_user_id), max(user_id, other_user_id)
+
+def latest_message_query(user_low_id: int, user_high_id: int):
+    """Newest message between two users, via ix_messages_pair_created_at_id"""
+    return (
+        select(Message)
+        .where(
+            func.least(Message.sender_id, Message.recipient_id) == user_low_id,
+            func.greatest(Message.sender_id, Message.recipient_id) == user_high_id
+        )
+        .order_by(desc(Message.created_at), desc(Message.id))
+        .limit(1)
+    )
+
+async def _add_unread(db: AsyncSession, user_id: int, delta: int) -> None:
+    statement = insert(UserMessageCount).values(user_id=user_id, unread_count=max(delta, 0))
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[UserMessageCount.user_id],
+        set_={"unread_count": func.greatest(UserMessageCount.unread_count + delta, 0)}
+    ))
+
+async def record_message(db: AsyncSession, message: Message) -> None:
+    """Make a flushed message the conversation's latest and count it as unread, in the caller's transaction"""
+    user_low_id, user_high_id = conversation_key(message.sender_id, message.recipient_id)
+    statement = insert(Conversation).values(
+        user_low_id=user_low_id,
+        user_high_id=user_high_id,
+        last_message_id=message.id,
+        # The transaction timestamp, i.e. the message's created_at server default
+        last_message_at=func.now(),
+        unread_low=1 if message.recipient_id == user_low_id else 0,
+        unread_high=1 if message.recipient_id == user_high_id and user_low_id != user_high_id else 0
+    )
+    # A concurrent send may commit after this one with an older timestamp; keep the newest message
+    is_newer = statement.excluded.last_message_at >= Conversation.last_message_at
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[Conversation.user_low_id, Conversation.user_high_id],
+        set_={
+            "last_message_id": case((is_newer, statement.excluded.last_message_id), else_=Conversation.last_message_id),
+            "last_message_at": func.greatest(Conversation.last_message_at, statement.excluded.last_message_at),
+            "unread_low": Conversation.unread_low + statement.excluded.unread_low,
+            "unread_high": Conversation.unread_high + statement.excluded.unread_high,
+        }
+    ))
+    await _add_unread(db, message.recipient_id, 1)
+
+async def mark_conversation_read(db: AsyncSession, reader_id: int, sender_id: int, count: int) -> None:
+    """Take ``count`` messages from ``sender_id`` off ``reader_id``'s unread counters"""
+    if count <= 0:
+        return
+    user_low_id, user_high_id = conversation_key(reader_id, sender_id)
+    column = "unread_low" if reader_id == user_low_id else "unread_high"
+    await db.execute(
+        update(Conversation)
+        .where(Conversation.user_low_id == user_low_id, Conversation.user_high_id == user_high_id)
+        .values({column: func.greatest(getattr(Conversation, column) - count, 0)})
+    )
+    await _add_unread(db, reader_id, -count)
+
+async def delete_messages(db: AsyncSession, *criteria) -> Set[int]:
+    """Delete matching messages and update the conversations they were summarized in.
+
+    Runs in the caller's transaction and takes the unread ones off their recipients' totals;
+    returns the ids of everyone in an affected conversation, whose cached totals go stale on commit.
+    """
+    deleted = (await db.execute(
+        delete(Message).where(*criteria).returning(Message.sender_id, Message.recipient_id, Message.is_read)
+    )).all()
+
+    # Unread messages removed per conversation, as [low side, high side], and per recipient
+    unread_removed = defaultdict(lambda: [0, 0])
+    unread_by_recipient: Counter = Counter()
+    for sender_id, recipient_id, is_read in deleted:
+        key = conversation_key(sender_id, recipient_id)
+        counts = unread_removed[key]
+        if not is_read:
+            counts[0 if recipient_id == key[0] else 1] += 1
+            unread_by_recipient[recipient_id] += 1
+
+    # Pair order matches record_message's row locks
+    for user_low_id, user_high_id in sorted(unread_removed):
+        removed_low, removed_high = unread_removed[(user_low_id, user_high_id)]
+        pair = (Conversation.user_low_id == user_low_id, Conversation.user_high_id == user_high_id)
+        latest = (await db.execute(
+            latest_message_query(user_low_id, user_high_id).with_only_columns(Message.id, Message.created_at)
+        )).first()
+        if latest is None:
+            await db.execute(delete(Conversation).where(*pair))
+            continue
+        await db.execute(
+            update(Conversation)
+            .where(*pair)
+            .values(
+                last_message_id=latest.id,
+                last_message_at=latest.created_at,
+                unread_low=func.greatest(Conversation.unread_low - removed_low, 0),
+                unread_high=func.greatest(Conversation.unread_high - removed_high, 0)
+            )
+        )
+
+    for recipient_id in sorted(unread_by_recipient):
+        await _add_unread(db, recipient_id, -unread_by_recipient[recipient_id])
+
+    return {user_id for pair in unread_removed for user_id in pair}
+
+def invalidate_unread_counts(user_ids: Iterable[int]) -> None:
+    """Drop cached unread totals; call once the change behind them has committed"""
+    for user_id in user_ids:
+        _unread_count_generation[user_id] += 1
+        unread_count_cache.invalidate(user_id)
+
+async def get_user_unread_count(db: AsyncSession, user_id: int) -> int:
+    """A user's unread message total, read through the cache"""
+    cached = unread_count_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = _unread_count_generation[user_id]
+    count = await db.scalar(select(UserMessageCount.unread_count).where(UserMessageCount.user_id == user_id))
+    if count is None:
+        # No counter row yet: count over ix_messages_recipient_unread and seed one
+        count = await db.scalar(select(func.count(Message.id)).where(
+            Message.recipient_id == user_id,
+            Message.is_read == False
+        ))
+        await db.execute(
+            insert(UserMessageCount)
+            .values(user_id=user_id, unread_count=count)
+            .on_conflict_do_nothing(index_elements=[UserMessageCount.user_id])
+        )
+        await db.commit()
+
+    if _unread_count_generation[user_id] == generation:
+        unread_count_cache.set(user_id, count)
+    return count
+
+# Message and read events, from this worker or relayed from others, change unread totals
+message_hub.add_handler(lambda user_ids, event: invalidate_unread_counts(user_ids))
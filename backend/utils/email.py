@@ -1,13 +1,126 @@
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 import os
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 import logging
 
 logger = logging.getLogger(__name__)
 
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "..", "email_templates")
+
+# (to_emails, subject, html_content, text_content) as accepted by send_many
+OutgoingEmail = Tuple[List[str], str, str, Optional[str]]
+
+@lru_cache(maxsize=1)
+def get_template_env() -> Optional[Environment]:
+    """The process-wide Jinja environment, or None when the template directory is missing"""
+    if not os.path.exists(TEMPLATE_PATH):
+        logger.warning(f"Email template directory not found: {TEMPLATE_PATH}")
+        return None
+    return Environment(loader=FileSystemLoader(TEMPLATE_PATH))
+
+@lru_cache(maxsize=64)
+def get_template(template_name: str) -> Template:
+    """Compile a template once per process"""
+    return get_template_env().get_template(template_name)
+
+class SMTPConnectionPool:
+    """Thread-safe pool of authenticated SMTP sessions.
+
+    Connections are kept open between messages and checked with NOOP
+    before reuse once they have sat idle for ``keepalive_check`` seconds,
+    so most sends skip the TCP, STARTTLS and AUTH round trips entirely.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        size: int = 4,
+        timeout: float = 30.0,
+        keepalive_check: float = 30.0,
+        max_idle: float = 300.0
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.keepalive_check = keepalive_check
+        self.max_idle = max_idle
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._pid = os.getpid()
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        connection.starttls()
+        connection.login(self.username, self.password)
+        return connection
+
+    @staticmethod
+    def _close(connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+
+    def _is_alive(self, connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    def acquire(self) -> smtplib.SMTP:
+        """Take an idle live connection, or open a new one; blocks while ``size`` are in use"""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if self._pid != os.getpid():
+                        # A forked child must not share its parent's sockets; forget them without QUIT
+                        self._idle = []
+                        self._pid = os.getpid()
+                    if not self._idle:
+                        break
+                    connection, released_at = self._idle.pop()
+                idle_for = time.monotonic() - released_at
+                if idle_for < self.keepalive_check:
+                    return connection
+                if idle_for < self.max_idle and self._is_alive(connection):
+                    return connection
+                self._close(connection)
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection: smtplib.SMTP, broken: bool = False) -> None:
+        """Return a connection to the pool, or close it if it failed mid-conversation"""
+        try:
+            if broken:
+                self._close(connection)
+            else:
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close_all(self) -> None:
+        """Close every idle connection, e.g. at the end of a batch run"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._close(connection)
+
 class EmailService:
     def __init__(self):
         self.smtp_server = os.getenv("SMTP_SERVER", "localhost")
@@ -16,14 +129,44 @@ class EmailService:
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
         self.from_email = os.getenv("FROM_EMAIL", "noreply@jobplatform.com")
         self.from_name = os.getenv("FROM_NAME", "Job Platform")
-        
-        # Setup Jinja2 environment for email templates
-        template_path = os.path.join(os.path.dirname(__file__), "..", "email_templates")
-        if os.path.exists(template_path):
-            self.template_env = Environment(loader=FileSystemLoader(template_path))
-        else:
-            self.template_env = None
-            logger.warning(f"Email template directory not found: {template_path}")
+
+        # Servers commonly cap messages per session; recycle the connection before reaching it
+        self.messages_per_connection = int(os.getenv("SMTP_MESSAGES_PER_CONNECTION", "100"))
+
+        self.pool = None
+        if self.smtp_username and self.smtp_password:
+            self.pool = SMTPConnectionPool(
+                self.smtp_server,
+                self.smtp_port,
+                self.smtp_username,
+                self.smtp_password,
+                size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+                timeout=float(os.getenv("SMTP_TIMEOUT", "30")),
+                keepalive_check=float(os.getenv("SMTP_KEEPALIVE_CHECK", "30"))
+            )
+
+    def build_message(
+        self,
+        to_emails: List[str],
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Assemble a multipart message with an optional plain-text alternative"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{self.from_name} <{self.from_email}>"
+        msg['To'] = ', '.join(to_emails)
+
+        # Add text part if provided
+        if text_content:
+            text_part = MIMEText(text_content, 'plain')
+            msg.attach(text_part)
+
+        # Add HTML part
+        html_part = MIMEText(html_content, 'html')
+        msg.attach(html_part)
+        return msg
 
     def send_email(
         self,
@@ -33,110 +176,129 @@ class EmailService:
         text_content: Optional[str] = None
     ) -> bool:
         """Send an email to recipients"""
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
-            msg['To'] = ', '.join(to_emails)
-
-            # Add text part if provided
-            if text_content:
-                text_part = MIMEText(text_content, 'plain')
-                msg.attach(text_part)
-
-            # Add HTML part
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
-
-            # Send email
-            if self.smtp_username and self.smtp_password:
-                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
-            else:
-                # For development - just log the email
+        return self.send_many([(to_emails, subject, html_content, text_content)])[0]
+
+    def send_many(self, emails: Iterable[OutgoingEmail]) -> List[bool]:
+        """Send a batch over as few SMTP sessions as possible; returns per-message success"""
+        emails = list(emails)
+        if self.pool is None:
+            # For development - just log the emails
+            for to_emails, subject, html_content, _ in emails:
                 logger.info(f"[EMAIL] To: {', '.join(to_emails)}")
                 logger.info(f"[EMAIL] Subject: {subject}")
                 logger.info(f"[EMAIL] Content: {html_content}")
-                
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
-            return False
+            return [True] * len(emails)
+
+        results = []
+        connection = None
+        sent_on_connection = 0
+        try:
+            for to_emails, subject, html_content, text_content in emails:
+                msg = self.build_message(to_emails, subject, html_content, text_content)
+                for attempt in range(2):
+                    try:
+                        if connection is None or sent_on_connection >= self.messages_per_connection:
+                            if connection is not None:
+                                self.pool.release(connection, broken=True)
+                                connection = None
+                            connection = self.pool.acquire()
+                            sent_on_connection = 0
+                        connection.send_message(msg)
+                        sent_on_connection += 1
+                        results.append(True)
+                        break
+                    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                        # The server rejected this message only; the session stays usable
+                        logger.error(f"Failed to send email: {str(e)}")
+                        results.append(False)
+                        break
+                    except OSError as e:
+                        # The session dropped (SMTPServerDisconnected, socket errors); retry once on a fresh one
+                        if connection is not None:
+                            self.pool.release(connection, broken=True)
+                            connection = None
+                        if attempt:
+                            logger.error(f"Failed to send email: {str(e)}")
+                            results.append(False)
+                    except Exception as e:
+                        logger.error(f"Failed to send email: {str(e)}")
+                        results.append(False)
+                        break
+        finally:
+            if connection is not None:
+                self.pool.release(connection)
+        return results
 
     def render_template(self, template_name: str, **kwargs) -> str:
         """Render an email template with context variables"""
-        if not self.template_env:
+        if not get_template_env():
             # Fallback to simple string formatting if no template engine
             return f"<html><body><h1>{template_name}</h1><pre>{kwargs}</pre></body></html>"
-        
+
         try:
-            template = self.template_env.get_template(template_name)
-            return template.render(**kwargs)
+            return get_template(template_name).render(**kwargs)
         except Exception as e:
             logger.error(f"Failed to render template {template_name}: {str(e)}")
             return f"<html><body><p>Error rendering email template</p></body></html>"
 
+# Shared by all helpers so connections and compiled templates are reused across messages
+email_service = EmailService()
+
 # Email notification functions
 def send_welcome_email(user_email: str, user_name: str, user_type: str):
     """Send welcome email to new user"""
-    email_service = EmailService()
-    
     subject = "Welcome to Job Platform!"
-    html_content = email_service.render_template("welcome.html", 
-        user_name=user_name, 
+    html_content = email_service.render_template("welcome.html",
+        user_name=user_name,
         user_type=user_type
     )
-    
+
     return email_service.send_email([user_email], subject, html_content)
 
 def send_job_application_notification(employer_email: str, job_title: str, candidate_name: str):
     """Send notification to employer about new job application"""
-    email_service = EmailService()
-    
     subject = f"New Application for {job_title}"
     html_content = email_service.render_template("job_application.html",
         job_title=job_title,
         candidate_name=candidate_name
     )
-    
+
     return email_service.send_email([employer_email], subject, html_content)
 
 def send_application_status_update(candidate_email: str, job_title: str, company_name: str, new_status: str):
     """Send notification to candidate about application status change"""
-    email_service = EmailService()
-    
     subject = f"Application Update: {job_title} at {company_name}"
     html_content = email_service.render_template("application_status.html",
         job_title=job_title,
         company_name=company_name,
         status=new_status
     )
-    
+
     return email_service.send_email([candidate_email], subject, html_content)
 
 def send_new_message_notification(recipient_email: str, sender_name: str, subject: str):
     """Send notification about new message"""
-    email_service = EmailService()
-    
     email_subject = f"New Message from {sender_name}"
     html_content = email_service.render_template("new_message.html",
         sender_name=sender_name,
         message_subject=subject
     )
-    
+
     return email_service.send_email([recipient_email], email_subject, html_content)
 
 def send_job_alert(candidate_email: str, candidate_name: str, matching_jobs: List[dict]):
     """Send job alert email to candidate with matching jobs"""
-    email_service = EmailService()
-    
+    return send_job_alerts([(candidate_email, candidate_name, matching_jobs)])[0]
+
+def send_job_alerts(alerts: Iterable[Tuple[str, str, List[dict]]]) -> List[bool]:
+    """Send many job alerts, given as (email, name, matching_jobs), over shared SMTP sessions"""
     subject = f"New Job Opportunities for You"
-    html_content = email_service.render_template("job_alert.html",
-        candidate_name=candidate_name,
-        jobs=matching_jobs
+    return email_service.send_many(
+        (
+            [candidate_email],
+            subject,
+            email_service.render_template("job_alert.html", candidate_name=candidate_name, jobs=matching_jobs),
+            None
+        )
+        for candidate_email, candidate_name, matching_jobs in alerts
     )
-    
-    return email_service.send_email([candidate_email], subject, html_content)
\ No newline at end of file
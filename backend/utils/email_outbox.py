@@ -0,0 +1,159 @@
+"""Transactional outbox for notification emails.
+
+Request handlers call ``enqueue_email`` inside their own transaction, so a
+notification is queued exactly when the change behind it commits and the
+request never waits on SMTP. Separate worker processes deliver the queue:
+
+    python -m utils.email_outbox --consumers 4
+
+Consumers claim due messages with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+any number of them, in any number of processes, share the queue without
+picking up the same message. Failed sends are retried with exponential
+backoff until MAX_ATTEMPTS is reached.
+"""
+import argparse
+import logging
+import random
+import signal
+import threading
+from datetime import timedelta
+from typing import Optional, Sequence
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from database import engine
+from models.email_outbox import EmailOutbox
+from utils.email import (
+    send_welcome_email, send_job_application_notification, send_application_status_update,
+    send_new_message_notification, send_job_alert
+)
+
+logger = logging.getLogger(__name__)
+
+# Outbox kinds and the functions that deliver them; payloads are their keyword arguments
+EMAIL_SENDERS = {
+    "welcome": send_welcome_email,
+    "job_application": send_job_application_notification,
+    "application_status": send_application_status_update,
+    "new_message": send_new_message_notification,
+    "job_alert": send_job_alert,
+}
+
+BATCH_SIZE = 20
+POLL_INTERVAL = 2.0
+MAX_ATTEMPTS = 8
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(hours=6)
+
+# A claimed message is retried after this long if its consumer dies before reporting back
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+async def enqueue_emails(db: AsyncSession, kind: str, payloads: Sequence[dict]) -> None:
+    """Queue one email per payload in the caller's transaction"""
+    if kind not in EMAIL_SENDERS:
+        raise ValueError(f"Unknown email kind: {kind}")
+    if payloads:
+        await db.execute(
+            EmailOutbox.__table__.insert(),
+            [{"kind": kind, "payload": payload} for payload in payloads]
+        )
+
+async def enqueue_email(db: AsyncSession, kind: str, **payload) -> None:
+    """Queue an email in the caller's transaction, e.g. enqueue_email(db, "welcome", user_email=...)"""
+    await enqueue_emails(db, kind, [payload])
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt, doubling per failure with a little jitter"""
+    delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+    return delay * random.uniform(1.0, 1.25)
+
+def _deliver(kind: str, payload: dict) -> Optional[str]:
+    """Send one message; returns an error description, or None when it was sent"""
+    sender = EMAIL_SENDERS.get(kind)
+    if sender is None:
+        return f"Unknown email kind: {kind}"
+    try:
+        # Senders log and return False on SMTP errors rather than raising
+        return None if sender(**payload) else "Sender reported a failure"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+def process_batch(batch_size: int = BATCH_SIZE) -> int:
+    """Claim up to ``batch_size`` due messages and try to send them; returns how many were claimed"""
+    with Session(engine) as db:
+        due = (
+            select(EmailOutbox)
+            .where(
+                EmailOutbox.sent_at.is_(None),
+                EmailOutbox.failed_at.is_(None),
+                EmailOutbox.next_attempt_at <= func.now()
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        messages = db.scalars(due).all()
+        claimed = []
+        for message in messages:
+            message.attempts += 1
+            message.next_attempt_at = func.now() + CLAIM_TIMEOUT
+            claimed.append((message.id, message.kind, message.payload, message.attempts))
+        # Commit the claim before sending so no row lock is held across SMTP round trips
+        db.commit()
+
+        for message_id, kind, payload, attempts in claimed:
+            error = _deliver(kind, payload)
+            if error is None:
+                values = {"sent_at": func.now(), "last_error": None}
+            elif attempts >= MAX_ATTEMPTS:
+                values = {"failed_at": func.now(), "last_error": error}
+                logger.error(f"Giving up on email {message_id} ({kind}) after {attempts} attempts: {error}")
+            else:
+                values = {"next_attempt_at": func.now() + retry_delay(attempts), "last_error": error}
+                logger.warning(f"Email {message_id} ({kind}) failed, attempt {attempts}: {error}")
+            db.execute(update(EmailOutbox).where(EmailOutbox.id == message_id).values(**values))
+            db.commit()
+
+    return len(claimed)
+
+def _consume(stop: threading.Event, batch_size: int, poll_interval: float) -> None:
+    while not stop.is_set():
+        try:
+            claimed = process_batch(batch_size)
+        except Exception as e:
+            logger.error(f"Email outbox consumer error: {e}")
+            claimed = 0
+        # Keep going while there is a backlog; otherwise poll
+        if claimed < batch_size:
+            stop.wait(poll_interval)
+
+def run_consumers(consumers: int = 1, batch_size: int = BATCH_SIZE, poll_interval: float = POLL_INTERVAL) -> None:
+    """Run consumer threads until SIGINT or SIGTERM"""
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    threads = [
+        threading.Thread(target=_consume, args=(stop, batch_size, poll_interval), name=f"email-outbox-{number}")
+        for number in range(consumers)
+    ]
+    for thread in threads:
+        thread.start()
+    logger.info(f"Email outbox: {consumers} consumers running")
+
+    # Main thread stays interruptible while consumers work
+    while not stop.wait(1.0):
+        pass
+    for thread in threads:
+        thread.join()
+    logger.info("Email outbox: stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver queued notification emails")
+    parser.add_argument("--consumers", type=int, default=4, help="parallel consumer threads")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="messages claimed per round trip")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="seconds to wait when idle")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_consumers(consumers=args.consumers, batch_size=args.batch_size, poll_interval=args.poll_interval)
@@ -0,0 +1,60 @@
+import hashlib
+import math
+from typing import Optional
+
+class HyperLogLog:
+    """HyperLogLog cardinality sketch with byte-per-register serialization.
+
+    With the default precision of 11 a sketch is 2048 bytes and estimates
+    distinct counts with roughly 2.3% standard error. Sketches of the same
+    precision merge losslessly by taking the per-register maximum.
+    """
+
+    def __init__(self, precision: int = 11, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.size)
+        elif len(registers) != self.size:
+            raise ValueError(f"expected {self.size} registers, got {len(registers)}")
+        else:
+            self.registers = bytearray(registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Rebuild a sketch from ``to_bytes`` output"""
+        return cls(precision=int(math.log2(len(data))), registers=data)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    def add(self, item: str) -> None:
+        """Observe one item"""
+        hashed = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remaining_bits = 64 - self.precision
+        remainder = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold another sketch into this one in place"""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct items observed"""
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+
+        # Linear counting is more accurate while many registers are still empty
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+
+        return int(round(estimate))
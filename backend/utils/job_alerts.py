@@ -0,0 +1,226 @@
+"""Nightly job-alert digests.
+
+Matches every job published since the previous run against candidates'
+stored skills and work preferences and sends each matched candidate one
+digest through ``send_job_alerts``. Digests that fail to send are queued
+in the email outbox, which retries them, in the same transaction that
+advances the run's watermark. Meant to be scheduled, e.g. from cron:
+
+    0 2 * * * cd /app && python -m utils.job_alerts
+"""
+import argparse
+import logging
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from database import engine
+from models.email_outbox import EmailOutbox
+from models.job import Job, JobStatus, LocationType
+from models.skill import JobSkill, CandidateSkill
+from models.system_settings import SystemSettings
+from models.user import User, UserType
+from utils.email import email_service, send_job_alerts
+from utils.recommendations import location_code
+
+logger = logging.getLogger(__name__)
+
+LAST_RUN_SETTING = "job_alerts_last_run"
+DEFAULT_LOOKBACK = timedelta(days=1)
+CHUNK_SIZE = 10000
+MAX_JOBS_PER_ALERT = 10
+
+# Candidate work-type preferences that accept a job of each location type (-1: no preference)
+ACCEPTED_WORK_TYPES = {
+    location_code(LocationType.REMOTE): {-1, location_code(LocationType.REMOTE), location_code(LocationType.HYBRID)},
+    location_code(LocationType.HYBRID): {-1, location_code(LocationType.HYBRID), location_code(LocationType.ON_SITE)},
+    location_code(LocationType.ON_SITE): {-1, location_code(LocationType.ON_SITE), location_code(LocationType.HYBRID)},
+    -1: {-1, *range(len(LocationType))},
+}
+
+# Per-process copy of the run's new jobs, installed by _init_worker
+_jobs: List[dict] = []
+
+def _init_worker(jobs: List[dict]) -> None:
+    global _jobs
+    _jobs = jobs
+    # Forked workers never query; drop the inherited pool without closing the parent's sockets
+    engine.dispose(close=False)
+
+def match_candidates(candidates: Sequence, jobs: List[dict]) -> Dict[int, List[dict]]:
+    """Map candidate position in ``candidates`` to its best-matching jobs.
+
+    ``candidates`` rows are (id, email, name, preferred_work_type,
+    expected_salary, skill_ids). Rather than testing every candidate
+    against every job, the chunk is indexed by skill and by work-type
+    preference, so each job only visits candidates sharing a skill with it.
+    """
+    skill_index = defaultdict(list)
+    work_type_index = defaultdict(set)
+    for position, candidate in enumerate(candidates):
+        for skill_id in candidate[5]:
+            skill_index[skill_id].append(position)
+        work_type_index[location_code(candidate[3])].add(position)
+
+    matches = defaultdict(list)
+    for job_position, job in enumerate(jobs):
+        overlap = Counter()
+        for skill_id in job["skill_ids"]:
+            for position in skill_index.get(skill_id, ()):
+                overlap[position] += 1
+        if not overlap:
+            continue
+
+        accepted = set().union(*(
+            work_type_index.get(code, set()) for code in ACCEPTED_WORK_TYPES[job["location_code"]]
+        ))
+        for position, shared_skills in overlap.items():
+            if position not in accepted:
+                continue
+            expected_salary = candidates[position][4]
+            if expected_salary and job["salary_top"] is not None and job["salary_top"] < expected_salary:
+                continue
+            matches[position].append((shared_skills, job_position))
+
+    # Most shared skills first; jobs arrive newest first, so that breaks ties
+    digests = {}
+    for position, found in matches.items():
+        found.sort(key=lambda match: (-match[0], match[1]))
+        digests[position] = [jobs[job_position]["payload"] for _, job_position in found[:MAX_JOBS_PER_ALERT]]
+    return digests
+
+def _process_chunk(candidates: Sequence) -> Tuple[Counter, List[dict]]:
+    """Match one chunk of candidates and send their digests (runs in a worker process).
+
+    Returns the chunk's stats and the outbox payloads of the digests that failed.
+    """
+    stats = Counter(candidates=len(candidates))
+    alerts = [
+        (candidates[position][1], candidates[position][2], matching_jobs)
+        for position, matching_jobs in match_candidates(candidates, _jobs).items()
+    ]
+    failed = []
+    try:
+        # One batch per chunk, so the worker's pooled SMTP sessions carry many digests each
+        for (email, name, matching_jobs), sent in zip(alerts, send_job_alerts(alerts)):
+            stats["sent" if sent else "failed"] += 1
+            if not sent:
+                failed.append({"candidate_email": email, "candidate_name": name, "matching_jobs": matching_jobs})
+    finally:
+        # The worker may sit idle until the next chunk or the end of the run; don't hold sessions open
+        if email_service.pool is not None:
+            email_service.pool.close_all()
+    return stats, failed
+
+def load_new_jobs(db: Session, since: datetime, until: datetime) -> List[dict]:
+    """Active jobs published in (since, until], newest first, with their skill ids"""
+    published_at = func.coalesce(Job.published_at, Job.created_at)
+    result = db.execute(
+        select(Job, func.array_remove(func.array_agg(JobSkill.skill_id), None))
+        .outerjoin(JobSkill, JobSkill.job_id == Job.id)
+        .where(Job.status == JobStatus.ACTIVE, published_at > since, published_at <= until)
+        .group_by(Job.id)
+        .order_by(published_at.desc(), Job.id.desc())
+    )
+
+    jobs = []
+    for job, skill_ids in result.all():
+        jobs.append({
+            "skill_ids": skill_ids,
+            "location_code": location_code(job.location_type),
+            "salary_top": job.salary_max if job.salary_max is not None else job.salary_min,
+            "payload": {
+                "id": job.id,
+                "title": job.title,
+                "company_name": job.company_name,
+                "location": job.location,
+                "location_type": job.location_type.value if job.location_type else None,
+                "salary_min": job.salary_min,
+                "salary_max": job.salary_max,
+                "salary_currency": job.salary_currency,
+            },
+        })
+    return jobs
+
+def run_job_alerts(workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Counter:
+    """Send digests for jobs published since the last run and advance the watermark"""
+    stats = Counter()
+    failed = []
+
+    def collect(future) -> None:
+        chunk_stats, chunk_failed = future.result()
+        stats.update(chunk_stats)
+        failed.extend(chunk_failed)
+
+    with Session(engine) as db:
+        started_at = db.scalar(select(func.now()))
+        setting = db.scalar(select(SystemSettings).where(SystemSettings.key == LAST_RUN_SETTING))
+        since = datetime.fromisoformat(setting.value) if setting and setting.value else started_at - DEFAULT_LOOKBACK
+
+        jobs = load_new_jobs(db, since, started_at)
+        stats["jobs"] = len(jobs)
+        logger.info(f"Job alerts: {len(jobs)} jobs published since {since.isoformat()}")
+
+        if jobs:
+            new_job_skills = sorted({skill_id for job in jobs for skill_id in job["skill_ids"]})
+
+            # Only candidates sharing a skill with some new job can match, so aggregate just those skills
+            candidates = (
+                select(
+                    User.id, User.email, User.name, User.preferred_work_type, User.expected_salary,
+                    func.array_agg(CandidateSkill.skill_id)
+                )
+                .join(CandidateSkill, CandidateSkill.candidate_id == User.id)
+                .where(
+                    User.user_type == UserType.CANDIDATE,
+                    User.is_active == True,
+                    CandidateSkill.skill_id.in_(new_job_skills)
+                )
+                .group_by(User.id)
+            )
+
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(jobs,)) as pool:
+                pending = set()
+                with engine.connect() as connection:
+                    result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(candidates)
+                    for chunk in result.partitions():
+                        # Keep a couple of chunks queued per worker so reading never races far ahead
+                        if len(pending) >= workers * 2:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                collect(future)
+                        pending.add(pool.submit(_process_chunk, [tuple(row) for row in chunk]))
+                for future in wait(pending).done:
+                    collect(future)
+
+        if setting is None:
+            setting = SystemSettings(
+                key=LAST_RUN_SETTING,
+                category="email",
+                description="Publication cutoff of the last job alert run"
+            )
+            db.add(setting)
+        setting.value = started_at.isoformat()
+        # The watermark moves past these jobs, so their failed digests go to the outbox for retrying
+        if failed:
+            db.execute(EmailOutbox.__table__.insert(), [{"kind": "job_alert", "payload": payload} for payload in failed])
+        db.commit()
+
+    logger.info(
+        f"Job alerts: checked {stats['candidates']} candidates, "
+        f"sent {stats['sent']} digests, {stats['failed']} failed and queued for retry"
+    )
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send job alert digests for newly published jobs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="candidates per worker task")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    run_job_alerts(workers=args.workers, chunk_size=args.chunk_size)
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import asyncpg
+from decouple import config
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import ASYNC_DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7900
+
+class Subscription:
+    """Events queued for one WebSocket connection"""
+
+    def __init__(self, user_id: int, max_pending: int):
+        self.user_id = user_id
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+
+    def put(self, event: dict) -> None:
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind should reconnect and resync over REST
+            self.close()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            # Wake a waiting get(); there is always room once the queue is drained
+            if not self._queue.full():
+                self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[dict]:
+        """Next event, or None once the subscription has been closed"""
+        if self.closed:
+            return None
+        event = await self._queue.get()
+        return None if self.closed else event
+
+class MessageHub:
+    """In-process pub/sub for per-user message events, bridged across workers.
+
+    WebSocket connections subscribe by user id. ``publish`` delivers to the
+    subscribers of this process immediately; ``notify`` queues a Postgres
+    NOTIFY in the caller's transaction, and every other worker's LISTEN
+    connection relays it to its own subscribers once that transaction commits.
+    """
+
+    def __init__(self, channel: str = "message_events", max_pending: int = 100, reconnect_delay: float = 5.0):
+        self.channel = channel
+        self.max_pending = max_pending
+        self.reconnect_delay = reconnect_delay
+        self.origin = uuid.uuid4().hex
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._handlers: List[Callable[[List[int], dict], None]] = []
+        self._task = None
+
+    def add_handler(self, handler: Callable[[List[int], dict], None]) -> None:
+        """Call ``handler(user_ids, event)`` for every event this process sees, local or relayed"""
+        self._handlers.append(handler)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.max_pending)
+        self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_ids: Iterable[int], event: dict) -> None:
+        """Deliver an event to this process's subscribers of each user"""
+        user_ids = list(set(user_ids))
+        for handler in self._handlers:
+            try:
+                handler(user_ids, event)
+            except Exception as e:
+                logger.error(f"Message hub handler failed: {e}")
+        for user_id in user_ids:
+            for subscription in list(self._subscriptions.get(user_id, ())):
+                subscription.put(event)
+
+    def _payload(self, user_ids: List[int], event: dict) -> str:
+        return json.dumps({"origin": self.origin, "user_ids": user_ids, "event": event})
+
+    async def notify(self, db: AsyncSession, user_ids: Iterable[int], event: dict) -> None:
+        """Queue the event for other workers; Postgres sends it when the caller's transaction commits.
+
+        Payloads are kept under Postgres's size limit, so this never aborts the caller's transaction.
+        """
+        user_ids = sorted(set(user_ids))
+        if len(self._payload(user_ids, event).encode()) > MAX_NOTIFY_PAYLOAD and "message" in event:
+            # Too large to relay whole; clients fetch the full message over REST
+            event = {**event, "message": {k: v for k, v in event["message"].items() if k != "content"}, "truncated": True}
+
+        budget = MAX_NOTIFY_PAYLOAD - len(self._payload([], event).encode())
+        if user_ids and budget < max(len(str(user_id)) for user_id in user_ids):
+            # Still too large for even one recipient; tell clients to resync over REST instead
+            event = {"type": "resync"}
+            budget = MAX_NOTIFY_PAYLOAD - len(self._payload([], event).encode())
+
+        # Too many recipients for one payload: one NOTIFY per chunk of them, each in ", "-separated JSON
+        chunk: List[int] = []
+        size = 0
+        for user_id in user_ids:
+            cost = len(str(user_id)) + (2 if chunk else 0)
+            if chunk and size + cost > budget:
+                await db.execute(select(func.pg_notify(self.channel, self._payload(chunk, event))))
+                chunk, size, cost = [], 0, len(str(user_id))
+            chunk.append(user_id)
+            size += cost
+        if chunk:
+            await db.execute(select(func.pg_notify(self.channel, self._payload(chunk, event))))
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        try:
+            notification = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed {channel} notification")
+            return
+        # This process already delivered its own events through publish()
+        if notification.get("origin") != self.origin:
+            self.publish(notification["user_ids"], notification["event"])
+
+    async def _listen(self) -> None:
+        dsn = make_url(ASYNC_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(self.channel, self._on_notification)
+                while not connection.is_closed():
+                    await asyncio.sleep(self.reconnect_delay)
+                    # Surfaces a dropped connection that asyncpg has not noticed yet
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Message hub listener error, reconnecting: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def start(self) -> None:
+        """Start relaying other workers' notifications on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop the listener and close every open subscription"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                self.unsubscribe(subscription)
+
+message_hub = MessageHub(
+    channel=config('MESSAGE_HUB_CHANNEL', default='message_events'),
+    max_pending=config('MESSAGE_HUB_MAX_PENDING', default=100, cast=int),
+)
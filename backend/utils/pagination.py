@@ -0,0 +1,30 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values) -> str:
+    """Encode keyset values (e.g. created_at, id) into an opaque URL-safe cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Decode a cursor produced by encode_cursor, coercing each value to the given type"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("cursor shape mismatch")
+        return tuple(
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value_type, value in zip(types, payload)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from decouple import config
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.job import Job, JobStatus, LocationType
+from models.skill import JobSkill
+
+logger = logging.getLogger(__name__)
+
+EXPERIENCE_LEVELS = ("entry", "mid", "senior", "executive")
+LOCATION_TYPES = list(LocationType)
+
+# Relative weight of each compatibility term in the final score
+SKILL_WEIGHT = 0.6
+SALARY_WEIGHT = 0.15
+LOCATION_WEIGHT = 0.15
+EXPERIENCE_WEIGHT = 0.1
+
+# Score given to a term when either side left the field blank
+NEUTRAL_SCORE = 0.5
+
+# Re-read rows changed slightly before the last refresh to cover transactions still in flight then
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+def experience_code(level: Optional[str]) -> int:
+    """Ordinal of a free-text experience level, or -1 when unrecognised"""
+    if level:
+        level = level.lower()
+        for code, name in enumerate(EXPERIENCE_LEVELS):
+            if name in level:
+                return code
+    return -1
+
+def location_code(work_type) -> int:
+    """Index into LOCATION_TYPES for a LocationType or a candidate's preferred_work_type"""
+    if isinstance(work_type, LocationType):
+        return LOCATION_TYPES.index(work_type)
+    if work_type:
+        value = work_type.strip().lower().replace("-", "_").replace(" ", "_")
+        for code, location_type in enumerate(LOCATION_TYPES):
+            if location_type.value == value:
+                return code
+    return -1
+
+class JobFeatureMatrix:
+    """In-memory feature matrix of active jobs for vectorized candidate matching.
+
+    Each job occupies one row of parallel NumPy arrays (salary, location
+    type, experience level, skill count). Skills are kept as a sparse
+    (row, skill_id) coordinate list, so scoring a candidate is a handful of
+    whole-array operations instead of a Python loop over jobs. The first
+    refresh loads every active job; later refreshes only re-read jobs
+    created or updated since the previous one, and deactivate the rows of
+    jobs that are no longer active, such as ones deleted by another worker.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._rows: Dict[int, int] = {}
+        self._job_ids = np.zeros(0, dtype=np.int64)
+        self._active = np.zeros(0, dtype=bool)
+        self._salary = np.zeros(0, dtype=np.float64)
+        self._location = np.zeros(0, dtype=np.int8)
+        self._experience = np.zeros(0, dtype=np.int8)
+        self._skill_counts = np.zeros(0, dtype=np.int32)
+        # Sparse skill matrix; a row of -1 marks an entry superseded by a later refresh
+        self._entry_rows = np.zeros(0, dtype=np.int64)
+        self._entry_skills = np.zeros(0, dtype=np.int64)
+        self._loaded_at = None
+        self._refreshed_at = 0.0
+        self._lock = None
+
+    def __len__(self) -> int:
+        return int(self._active.sum())
+
+    def mark_stale(self) -> None:
+        """Make the next ``ensure_fresh`` re-read changed jobs immediately"""
+        self._refreshed_at = 0.0
+
+    def discard(self, job_id: int) -> None:
+        """Stop recommending a job, e.g. right after it is deleted"""
+        row = self._rows.get(job_id)
+        if row is not None:
+            self._active[row] = False
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Refresh from the database if the last refresh is older than ``refresh_interval``"""
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another request may have refreshed while this one waited
+            if time.monotonic() - self._refreshed_at >= self.refresh_interval:
+                await self.refresh(db)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Load all active jobs on first use, afterwards only jobs changed since the last refresh"""
+        started_at = await db.scalar(select(func.now()))
+
+        changed = select(Job.id)
+        if self._loaded_at is None:
+            changed = changed.where(Job.status == JobStatus.ACTIVE)
+        else:
+            since = self._loaded_at - REFRESH_OVERLAP
+            changed = changed.where(or_(Job.created_at >= since, Job.updated_at >= since))
+
+        jobs = (await db.execute(
+            select(
+                Job.id, Job.status, Job.salary_min, Job.salary_max,
+                Job.location_type, Job.experience_level
+            ).where(Job.id.in_(changed))
+        )).all()
+        skills = (await db.execute(
+            select(JobSkill.job_id, JobSkill.skill_id).where(JobSkill.job_id.in_(changed))
+        )).all()
+
+        self._apply(jobs, skills)
+        if self._loaded_at is not None:
+            # Deletes leave nothing to re-read, and discard() only reached the worker that served them
+            active_ids = (await db.scalars(select(Job.id).where(Job.status == JobStatus.ACTIVE))).all()
+            self._retire(active_ids, [job.id for job in jobs])
+        self._loaded_at = started_at
+        self._refreshed_at = time.monotonic()
+        logger.debug(f"Job feature matrix refreshed: {len(jobs)} changed, {len(self)} active")
+
+    def _apply(self, jobs: Sequence, skills: Sequence) -> None:
+        """Upsert job rows and replace their skill entries"""
+        if not jobs:
+            return
+
+        new_ids = [job.id for job in jobs if job.id not in self._rows]
+        if new_ids:
+            first_row = len(self._job_ids)
+            for offset, job_id in enumerate(new_ids):
+                self._rows[job_id] = first_row + offset
+            count = len(new_ids)
+            self._job_ids = np.concatenate([self._job_ids, np.array(new_ids, dtype=np.int64)])
+            self._active = np.concatenate([self._active, np.zeros(count, dtype=bool)])
+            self._salary = np.concatenate([self._salary, np.full(count, np.nan)])
+            self._location = np.concatenate([self._location, np.full(count, -1, dtype=np.int8)])
+            self._experience = np.concatenate([self._experience, np.full(count, -1, dtype=np.int8)])
+            self._skill_counts = np.concatenate([self._skill_counts, np.zeros(count, dtype=np.int32)])
+
+        rows = np.array([self._rows[job.id] for job in jobs], dtype=np.int64)
+        self._active[rows] = [job.status == JobStatus.ACTIVE for job in jobs]
+        # Compare against the top of the advertised range, falling back to its floor
+        self._salary[rows] = [
+            job.salary_max if job.salary_max is not None
+            else job.salary_min if job.salary_min is not None
+            else np.nan
+            for job in jobs
+        ]
+        self._location[rows] = [location_code(job.location_type) for job in jobs]
+        self._experience[rows] = [experience_code(job.experience_level) for job in jobs]
+
+        # Retire the old skill entries of every refreshed job, then append the current ones
+        self._entry_rows[np.isin(self._entry_rows, rows)] = -1
+        new_rows = np.array([self._rows[job_id] for job_id, _ in skills], dtype=np.int64)
+        new_skills = np.array([skill_id for _, skill_id in skills], dtype=np.int64)
+        self._entry_rows = np.concatenate([self._entry_rows, new_rows])
+        self._entry_skills = np.concatenate([self._entry_skills, new_skills])
+        self._skill_counts[rows] = np.bincount(new_rows, minlength=len(self._job_ids))[rows]
+
+        live = self._entry_rows >= 0
+        if live.sum() * 2 < len(self._entry_rows):
+            self._entry_rows = self._entry_rows[live]
+            self._entry_skills = self._entry_skills[live]
+
+    def _retire(self, active_ids: Sequence[int], refreshed_ids: Sequence[int]) -> None:
+        """Deactivate rows whose jobs are no longer active, except those just refreshed"""
+        gone = ~np.isin(self._job_ids, np.asarray(active_ids, dtype=np.int64))
+        # A job read as changed may have been activated after the id list was taken
+        gone[[self._rows[job_id] for job_id in refreshed_ids]] = False
+        self._active[gone] = False
+
+    def score(
+        self,
+        skill_ids: Sequence[int],
+        expected_salary: Optional[float] = None,
+        preferred_work_type: Optional[str] = None,
+        experience_level: Optional[str] = None
+    ) -> np.ndarray:
+        """Match score in [0, 1] for every row; inactive rows score -inf"""
+        size = len(self._job_ids)
+
+        # Cosine similarity between the binary skill vectors of candidate and job
+        if len(skill_ids):
+            hits = np.isin(self._entry_skills, np.asarray(skill_ids, dtype=np.int64)) & (self._entry_rows >= 0)
+            overlap = np.bincount(self._entry_rows[hits], minlength=size)
+            skill_score = overlap / np.sqrt(np.maximum(self._skill_counts, 1) * len(skill_ids))
+        else:
+            skill_score = np.zeros(size)
+
+        # Full marks when the job pays what the candidate expects, fading linearly below that
+        if expected_salary:
+            salary_score = np.clip(self._salary / float(expected_salary), 0.0, 1.0)
+            salary_score[np.isnan(self._salary)] = NEUTRAL_SCORE
+        else:
+            salary_score = np.full(size, NEUTRAL_SCORE)
+
+        # Exact work-type match scores 1, hybrid is halfway between remote and on-site
+        preferred = location_code(preferred_work_type)
+        if preferred >= 0:
+            hybrid = location_code(LocationType.HYBRID)
+            location_score = np.where(
+                self._location == preferred, 1.0,
+                np.where((self._location == hybrid) | (preferred == hybrid), 0.5, 0.0)
+            )
+            location_score[self._location < 0] = NEUTRAL_SCORE
+        else:
+            location_score = np.full(size, NEUTRAL_SCORE)
+
+        # One level apart loses a third of the score
+        level = experience_code(experience_level)
+        if level >= 0:
+            distance = np.abs(self._experience.astype(np.int16) - level)
+            experience_score = np.where(
+                self._experience >= 0, 1.0 - distance / (len(EXPERIENCE_LEVELS) - 1), NEUTRAL_SCORE
+            )
+        else:
+            experience_score = np.full(size, NEUTRAL_SCORE)
+
+        scores = (
+            SKILL_WEIGHT * skill_score
+            + SALARY_WEIGHT * salary_score
+            + LOCATION_WEIGHT * location_score
+            + EXPERIENCE_WEIGHT * experience_score
+        )
+        scores[~self._active] = -np.inf
+        return scores
+
+    def top(self, scores: np.ndarray, skip: int, limit: int) -> List[Tuple[int, float]]:
+        """(job_id, score) pairs for ranks ``skip`` to ``skip + limit``, best first"""
+        eligible = int(np.isfinite(scores).sum())
+        count = min(skip + limit, eligible)
+        if count <= skip:
+            return []
+
+        # Partial selection is O(n); only the top slice gets fully sorted
+        candidates = np.argpartition(-scores, count - 1)[:count]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")][skip:count]
+        return [(int(self._job_ids[row]), float(scores[row])) for row in ranked]
+
+job_matrix = JobFeatureMatrix(
+    refresh_interval=config('RECOMMENDATION_REFRESH_INTERVAL', default=30.0, cast=float),
+)
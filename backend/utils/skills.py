@@ -0,0 +1,96 @@
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Union
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.skill import Skill, JobSkill, CandidateSkill
+
+MAX_SKILL_LENGTH = 100
+
+def normalize_skill(name: str) -> str:
+    """Canonical dictionary form of a skill name: lowercase, single-spaced"""
+    return re.sub(r"\s+", " ", name).strip().lower()[:MAX_SKILL_LENGTH]
+
+def parse_skills(raw: Optional[Union[str, Iterable[str]]]) -> List[str]:
+    """Parse a JSON array, a comma-separated string or a list into unique normalized skills"""
+    if not raw:
+        return []
+
+    items = raw
+    if isinstance(raw, str):
+        items = None
+        if raw.strip().startswith("["):
+            try:
+                parsed = json.loads(raw)
+                if isinstance(parsed, list):
+                    items = parsed
+            except ValueError:
+                pass
+        if items is None:
+            items = raw.split(",")
+
+    skills = []
+    for item in items:
+        skill = normalize_skill(str(item))
+        if skill and skill not in skills:
+            skills.append(skill)
+    return skills
+
+async def get_skill_id_map(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """Resolve skill names to dictionary ids, adding any that are new"""
+    names = sorted(set(names))
+    if not names:
+        return {}
+
+    await db.execute(insert(Skill).on_conflict_do_nothing(), [{"name": name} for name in names])
+    result = await db.execute(select(Skill.name, Skill.id).where(Skill.name.in_(names)))
+    return dict(result.all())
+
+async def get_skill_ids(db: AsyncSession, names: List[str]) -> List[int]:
+    """Resolve skill names to dictionary ids, adding any that are new"""
+    return list((await get_skill_id_map(db, names)).values())
+
+async def sync_job_skills(db: AsyncSession, job_id: int, required_skills) -> None:
+    """Replace a job's job_skills rows with the skills parsed from required_skills"""
+    skill_ids = await get_skill_ids(db, parse_skills(required_skills))
+    await db.execute(delete(JobSkill).where(JobSkill.job_id == job_id))
+    if skill_ids:
+        await db.execute(
+            insert(JobSkill).values([{"job_id": job_id, "skill_id": skill_id} for skill_id in skill_ids])
+        )
+
+async def add_job_skills(db: AsyncSession, required_skills_by_job: Dict[int, Optional[str]]) -> None:
+    """Tag freshly inserted jobs with their skills using one insert per table"""
+    names_by_job = {job_id: parse_skills(raw) for job_id, raw in required_skills_by_job.items()}
+    skill_ids = await get_skill_id_map(db, (name for names in names_by_job.values() for name in names))
+    rows = [
+        {"job_id": job_id, "skill_id": skill_ids[name]}
+        for job_id, names in names_by_job.items() for name in names
+    ]
+    if rows:
+        # executemany form, so SQLAlchemy batches large imports under the bind-parameter limit
+        await db.execute(insert(JobSkill), rows)
+
+async def sync_candidate_skills(db: AsyncSession, candidate) -> None:
+    """Replace a candidate's candidate_skills rows from their skills and technical_skills"""
+    names = parse_skills(candidate.skills)
+    names += [name for name in parse_skills(candidate.technical_skills) if name not in names]
+    skill_ids = await get_skill_ids(db, names)
+    await db.execute(delete(CandidateSkill).where(CandidateSkill.candidate_id == candidate.id))
+    if skill_ids:
+        await db.execute(
+            insert(CandidateSkill).values(
+                [{"candidate_id": candidate.id, "skill_id": skill_id} for skill_id in skill_ids]
+            )
+        )
+
+def jobs_with_all_skills(names: List[str]):
+    """Subquery of job ids tagged with every one of the given normalized skills"""
+    return (
+        select(JobSkill.job_id)
+        .join(Skill, Skill.id == JobSkill.skill_id)
+        .where(Skill.name.in_(names))
+        .group_by(JobSkill.job_id)
+        .having(func.count() == len(names))
+    )
@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from decouple import config
+from sqlalchemy import Integer, column, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import AsyncSessionLocal
+from models.job import Job
+from models.job_view_sketch import JobViewSketch, JobViewTotal
+from utils.hyperloglog import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+class ViewCountBuffer:
+    """Write-behind buffer for job view counts and unique-viewer sketches.
+
+    Detail views only bump an in-process counter and a per-(job, day)
+    HyperLogLog sketch; a background task folds the pending increments into
+    one batched UPDATE and merges the sketches into ``job_view_sketches``
+    every ``flush_interval`` seconds, or sooner once ``max_pending`` views
+    have accumulated.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = 1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Counter = Counter()
+        self._pending_total = 0
+        self._sketches: Dict[tuple, HyperLogLog] = {}
+        self._wake = None
+        self._task = None
+        self._stopping = False
+
+    def record(self, job_id: int, visitor_key: Optional[str] = None, count: int = 1) -> None:
+        """Buffer a view of ``job_id``, optionally by an identified visitor"""
+        if visitor_key is not None:
+            key = (job_id, datetime.utcnow().date())
+            sketch = self._sketches.get(key)
+            if sketch is None:
+                sketch = self._sketches[key] = HyperLogLog()
+            sketch.add(visitor_key)
+        self._pending[job_id] += count
+        self._pending_total += count
+        if self._pending_total >= self.max_pending and self._wake is not None:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write all buffered increments in a single statement; returns rows touched"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, Counter()
+        sketches, self._sketches = self._sketches, {}
+        self._pending_total = 0
+
+        # Sorted ids give every worker the same lock order on jobs rows
+        deltas = values(column("job_id", Integer), column("delta", Integer), name="view_deltas").data(
+            sorted(pending.items())
+        )
+        statement = (
+            update(Job)
+            .where(Job.id == deltas.c.job_id)
+            # View counts are not content edits, so keep updated_at untouched
+            .values(views_count=Job.views_count + deltas.c.delta, updated_at=Job.updated_at)
+            .returning(Job.id)
+            .execution_options(synchronize_session=False)
+        )
+
+        written = False
+        try:
+            async with AsyncSessionLocal() as db:
+                existing_job_ids = set((await db.execute(statement)).scalars().all())
+                await self._merge_sketches(
+                    db, {key: sketch for key, sketch in sketches.items() if key[0] in existing_job_ids}
+                )
+                await db.commit()
+            written = True
+            return len(existing_job_ids)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(pending)} job view counts: {e}")
+            return 0
+        finally:
+            if not written:
+                # Failed or cancelled mid-write: put the increments back so the next flush retries them
+                self._restore(pending, sketches)
+
+    def _restore(self, pending: Counter, sketches: Dict[tuple, HyperLogLog]) -> None:
+        for job_id, count in pending.items():
+            self.record(job_id, count=count)
+        for key, sketch in sketches.items():
+            if key in self._sketches:
+                sketch.merge(self._sketches[key])
+            self._sketches[key] = sketch
+
+    async def _merge_sketches(self, db: AsyncSession, sketches: Dict[tuple, HyperLogLog]) -> None:
+        """Merge buffered sketches into their stored (job_id, day) rows"""
+        if not sketches:
+            return
+
+        keys = sorted(sketches)
+
+        # Create missing rows first so concurrent workers contend on row locks rather than inserts
+        empty = HyperLogLog().to_bytes()
+        await db.execute(
+            insert(JobViewSketch)
+            .values([{"job_id": job_id, "day": day, "sketch": empty} for job_id, day in keys])
+            .on_conflict_do_nothing()
+        )
+
+        stored = await db.execute(
+            select(JobViewSketch.job_id, JobViewSketch.day, JobViewSketch.sketch)
+            .where(tuple_(JobViewSketch.job_id, JobViewSketch.day).in_(keys))
+            .order_by(JobViewSketch.job_id, JobViewSketch.day)
+            .with_for_update()
+        )
+        merged = [
+            {
+                "job_id": job_id,
+                "day": day,
+                "sketch": HyperLogLog.from_bytes(data).merge(sketches[(job_id, day)]).to_bytes(),
+            }
+            for job_id, day, data in stored.all()
+        ]
+        await db.execute(update(JobViewSketch), merged)
+
+        # Fold the same views into each job's all-time sketch and refresh its estimate
+        by_job: Dict[int, HyperLogLog] = {}
+        for (job_id, _), sketch in sketches.items():
+            if job_id in by_job:
+                by_job[job_id].merge(sketch)
+            else:
+                by_job[job_id] = HyperLogLog.from_bytes(sketch.to_bytes())
+        job_ids = sorted(by_job)
+        await db.execute(
+            insert(JobViewTotal)
+            .values([{"job_id": job_id, "sketch": empty, "unique_views": 0} for job_id in job_ids])
+            .on_conflict_do_nothing()
+        )
+        stored = await db.execute(
+            select(JobViewTotal.job_id, JobViewTotal.sketch)
+            .where(JobViewTotal.job_id.in_(job_ids))
+            .order_by(JobViewTotal.job_id)
+            .with_for_update()
+        )
+        totals = []
+        for job_id, data in stored.all():
+            total = HyperLogLog.from_bytes(data).merge(by_job[job_id])
+            totals.append({"job_id": job_id, "sketch": total.to_bytes(), "unique_views": total.count()})
+        await db.execute(update(JobViewTotal), totals)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop"""
+        if self._task is None:
+            # Created here so the event binds to the server's loop, not the import-time one
+            self._wake = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write out anything still buffered"""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling it halfway through its write
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+def client_ip(client_host: Optional[str], forwarded_for: Optional[str], trusted_proxies: List[str]) -> Optional[str]:
+    """The viewer's address, taken from X-Forwarded-For only when the request came through a trusted proxy"""
+    if client_host is None or client_host not in trusted_proxies or not forwarded_for:
+        return client_host
+    # Walk back from the nearest hop; the first untrusted address is the one a client cannot spoof
+    for address in reversed([address.strip() for address in forwarded_for.split(",")]):
+        if address and address not in trusted_proxies:
+            return address
+    return client_host
+
+def visitor_key(user_id: Optional[int], client_ip: Optional[str]) -> Optional[str]:
+    """Identify a viewer by account, or by a keyed hash of their IP when anonymous"""
+    if user_id is not None:
+        return f"user:{user_id}"
+    if client_ip:
+        digest = hmac.new(settings.SECRET_KEY.encode(), client_ip.encode(), hashlib.sha256).hexdigest()
+        return f"ip:{digest}"
+    return None
+
+async def load_unique_views(db: AsyncSession, job_ids: Iterable[int]) -> Dict[int, int]:
+    """Approximate distinct viewers per job, from the estimates stored at flush time"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return {}
+
+    result = await db.execute(
+        select(JobViewTotal.job_id, JobViewTotal.unique_views).where(JobViewTotal.job_id.in_(job_ids))
+    )
+    unique_views = {job_id: 0 for job_id in job_ids}
+    unique_views.update(result.all())
+    return unique_views
+
+view_counter = ViewCountBuffer(
+    flush_interval=config('VIEW_COUNT_FLUSH_INTERVAL', default=5.0, cast=float),
+    max_pending=config('VIEW_COUNT_MAX_PENDING', default=1000, cast=int),
+)